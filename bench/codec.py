@@ -0,0 +1,68 @@
+"""Decode time of realistic alert and LUN response bodies per JSON codec.
+
+Usage: python -m bench.codec [number of items]
+
+The checks stream these bodies (see iter_data() in lib/utils.py), so the
+items are decoded by ItemStream from chunks of CHUNK_SIZE bytes; `full` is
+the decode time of the complete body for comparison.
+
+The codec used by the probe is selected with the JSON_CODEC environment
+variable; orjson is only measured when installed.
+"""
+import json
+import sys
+import timeit
+from typing import Any, Callable
+from lib import codec
+from lib.jsonstream import ItemStream
+from lib.utils import CHUNK_SIZE
+from .data import alerts, luns
+
+BODIES = {
+    '/api/log/v2/logs/alert': ('logs', alerts),
+    '/api/storage/v2/luns': ('luns', luns),
+}
+
+
+def get_codecs() -> dict[str, Callable[[bytes], Any]]:
+    codecs: dict[str, Callable[[bytes], Any]] = {'json': codec._stdlib_loads}
+    orjson_loads = codec._get_orjson_loads()
+    if orjson_loads is not None:
+        codecs['orjson'] = orjson_loads
+    return codecs
+
+
+def stream(chunks: list[bytes], key: str,
+           loads: Callable[[bytes], Any]) -> list[Any]:
+    items = ItemStream(key, loads)
+    out = []
+    for chunk in chunks:
+        out.extend(items.feed(chunk))
+    out.extend(items.close())
+    return out
+
+
+def measure(func: Callable[[], Any]) -> float:
+    number = 5
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    codecs = get_codecs()
+    print(f'probe codec: {codec.codec_name}')
+
+    for path, (key, func) in BODIES.items():
+        body = json.dumps(func(n)).encode()
+        chunks = [
+            body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+        print(f'\n{path}: {n} items, {len(body) / 1e6:.1f} MB body')
+        base = None
+        for name, loads in codecs.items():
+            for mode, duration in (
+                    ('stream', measure(lambda: stream(chunks, key, loads))),
+                    ('full', measure(lambda: loads(body)))):
+                base = base or duration
+                print(f'{name:>10} {mode:>6}: {duration * 1e3:8.1f} ms, '
+                      f'{len(body) / duration / 1e6:7.1f} MB/s, '
+                      f'{base / duration:5.2f}x')
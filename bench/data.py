@@ -0,0 +1,313 @@
+"""Synthetic ZFS appliance REST API payloads for benchmarks."""
+import time
+
+
+def lun(i: int) -> dict:
+    pool, project = f'pool-{i % 4}', f'project-{i % 40}'
+    return {
+        'canonical_name': f'{pool}/local/{project}/lun-{i}',
+        'href': f'/api/storage/v2/pools/{pool}/projects/{project}/luns/'
+                f'lun-{i}',
+        'pool': pool,
+        'project': project,
+        'name': f'lun-{i}',
+        'sparse': bool(i % 2),
+        'volsize': 107374182400 + i,
+        'volblocksize': 8192,
+        'lunguid': f'600144F0{i:024X}',
+        'status': 'online',
+        'compression': 'lz4',
+        'logbias': 'latency',
+        'usage': {
+            'available': 52428800000 - i,
+            'total': 107374182400,
+            'data': 52428800000 + i,
+            'compressratio': 150 + i % 100,
+            'snapshots': 0,
+            'loading': False,
+        },
+    }
+
+
+def alert(i: int, now: float | None = None) -> dict:
+    ts = (time.time() if now is None else now) - i * 5
+    return {
+        'uuid': f'{i:08x}-0b7e-4d1a-c2f3-a1b2c3d4e5f6',
+        'timestamp': time.strftime('%Y%m%dT%H:%M:%S', time.gmtime(ts)),
+        'description': f'The device {i % 24} in enclosure has been removed.',
+        'type': 'Major alert',
+        'severity': 'Major',
+        'response': 'The device will be ignored.',
+        'action': 'Replace the device.',
+        'impact': 'The pool might be degraded.',
+    }
+
+
+def problem(i: int) -> dict:
+    return {
+        'uuid': f'{i:08x}-1a2b-3c4d-5e6f-a1b2c3d4e5f6',
+        'code': f'AK-8000-{i % 100:02d}',
+        'description': f'Disk {i % 24} in enclosure is faulted.',
+        'severity': 'Major',
+        'type': 'Defect',
+        'impact': 'The pool might be degraded.',
+        'action': 'Replace the disk.',
+        'response': 'The disk has been removed from the pool.',
+        'repairable': False,
+        'diagnosed': time.strftime(
+            '%Y-%m-%dT%H:%M:%SZ', time.gmtime(1700000000 + i * 60)),
+    }
+
+
+def luns(n: int) -> dict:
+    return {'luns': [lun(i) for i in range(n)]}
+
+
+def alerts(n: int) -> dict:
+    now = time.time()
+    return {'logs': [alert(i, now) for i in range(n)]}
+
+
+def problems(n: int) -> dict:
+    return {'problems': [problem(i) for i in range(n)]}
+
+
+def pools(n: int) -> dict:
+    return {'pools': [{
+        'name': f'pool-{i}',
+        'href': f'/api/storage/v2/pools/pool-{i}',
+        'status': 'online',
+        'profile': 'mirror',
+        'owner': 'zfs',
+        'peer': '00000000-0000-0000-0000-000000000000',
+        'usage': {
+            'available': 52776558133248,
+            'used': 17592186044416 + i,
+            'total': 70368744177664,
+            'free': 52776558133248,
+            'compression': 1.5,
+            'dedupratio': 100,
+        },
+    } for i in range(n)]}
+
+
+def _space(i: int) -> dict:
+    return {
+        'space_available': 10995116277760 - i,
+        'space_data': 1099511627776 + i * 1048576,
+        'space_snapshots': 0,
+        'space_total': 1099511627776 + i * 1048576,
+        'space_unused_res': 0,
+        'quota': 0,
+        'reservation': 0,
+        'compressratio': 150 + i % 100,
+        'compression': 'lz4',
+        'checksum': 'fletcher4',
+        'dedup': False,
+        'logbias': 'latency',
+        'readonly': False,
+        'recordsize': 131072,
+        'sharenfs': 'on',
+        'sharesmb': 'off',
+        'snapdir': 'hidden',
+    }
+
+
+def projects(pool: str, n: int) -> dict:
+    return {'projects': [{
+        'name': f'project-{i}',
+        'pool': pool,
+        'href': f'/api/storage/v2/pools/{pool}/projects/project-{i}',
+        'mountpoint': f'/export/project-{i}',
+        **_space(i),
+    } for i in range(n)]}
+
+
+def filesystems(pool: str, project: str, n: int) -> dict:
+    return {'filesystems': [{
+        'name': f'share-{i}',
+        'pool': pool,
+        'project': project,
+        'canonical_name': f'{pool}/local/{project}/share-{i}',
+        'href': f'/api/storage/v2/pools/{pool}/projects/{project}/'
+                f'filesystems/share-{i}',
+        'mountpoint': f'/export/{project}/share-{i}',
+        'root_user': 'root',
+        'root_group': 'other',
+        'root_permissions': '700',
+        **_space(i),
+    } for i in range(n)]}
+
+
+def chassis(n: int) -> dict:
+    items = [{
+        'name': 'oracle_zfs',
+        'href': '/api/hardware/v2/chassis/chassis-000',
+        'faulted': False,
+        'manufacturer': 'Oracle',
+        'model': 'Oracle ZFS Storage ZS7-2',
+        'serial': '1234ABCD',
+        'type': 'system',
+        'part': '7319400',
+        'locate': False,
+    }]
+    for i in range(1, n):
+        items.append({
+            'name': f'DE3-24C-{i}',
+            'href': f'/api/hardware/v2/chassis/chassis-{i:03d}',
+            'faulted': False,
+            'manufacturer': 'Oracle',
+            'model': 'Oracle Storage DE3-24C',
+            'serial': f'{i:08X}',
+            'type': 'storage',
+            'rpm': 7200,
+            'part': '7316345',
+            'locate': False,
+        })
+    return {'chassis': items}
+
+
+def cluster(nodename: str, peer: str, n: int) -> dict:
+    # pools are owned by both heads in turn
+    return {'cluster': {
+        'state': 'AKCS_CLUSTERED',
+        'description': 'Active (takeover completed)',
+        'peer_asn': '3d5c7a7e-2b1e-c8e4-f9a0-b1c2d3e4f5a6',
+        'peer_hostname': peer,
+        'peer_state': 'AKCS_CLUSTERED',
+        'peer_description': 'Active (takeover completed)',
+        'resources': [{
+            'owner': nodename if i % 2 == 0 else peer,
+            'type': 'singleton',
+            'user_label': '',
+            'details': [f'pool-{i}'],
+            'href': f'/api/hardware/v2/cluster/resources/zfs/pool-{i}',
+        } for i in range(n)],
+    }}
+
+
+def network(n: int) -> dict[str, dict]:
+    return {
+        'routes': {'routes': [{
+            'href': f'/api/network/v2/routes/route-{i:03d}',
+            'destination': f'10.0.{i}.0',
+            'family': 'IPv4',
+            'gateway': f'10.0.{i}.1',
+            'interface': f'ixgbe{i}',
+            'mask': 24,
+            'status': 'active',
+            'type': 'static',
+        } for i in range(n)]},
+        'devices': {'devices': [{
+            'device': f'ixgbe{i}',
+            'active': True,
+            'duplex': 'full',
+            'factory_mac': f'0:10:e0:{i:x}:0:1',
+            'media': 'Ethernet',
+            'speed': '10000 Mbit/s',
+            'up': True,
+        } for i in range(n)]},
+        'interfaces': {'interfaces': [{
+            'interface': f'ixgbe{i}',
+            'admin': True,
+            'class': 'ip',
+            'curaddrs': [f'10.0.{i}.10/24'],
+            'enable': True,
+            'label': f'data-{i}',
+            'links': [f'ixgbe{i}'],
+            'state': 'up',
+            'v4addrs': [f'10.0.{i}.10/24'],
+            'v4dhcp': False,
+            'v6addrs': [],
+            'v6dhcp': False,
+        } for i in range(n)]},
+    }
+
+
+def system(nodename: str) -> dict[str, dict]:
+    return {
+        'disks': {'disks': {
+            'root': 34359738368,
+            'var': 17179869184,
+            'update': 4294967296,
+            'stash': 2147483648,
+            'dump': 8589934592,
+            'cores': 1073741824,
+            'unknown': 0,
+            'free': 214748364800,
+            'disk0': {'label': 'HDD 0', 'state': 'healthy'},
+            'disk1': {'label': 'HDD 1', 'state': 'healthy'},
+        }},
+        'memory': {'memory': {
+            'cache': 412316860416,
+            'kernel': 34359738368,
+            'management': 4294967296,
+            'other': 2147483648,
+            'unused': 68719476736,
+        }},
+        'version': {'version': {
+            'nodename': nodename,
+            'mkt_product': 'Oracle ZFS Storage ZS7-2',
+            'product': 'Sun ZFS Storage 7420',
+            'version': '2013.06.05.8.40,1-1.1',
+            'install_time': '2021-03-04T10:20:30Z',
+            'update_time': '2024-05-06T07:08:09Z',
+            'boot_time': '2024-05-06T07:18:09Z',
+            'asn': '2f4aeeb3-b670-ee53-e0a7-d8e0ae410749',
+            'csn': '1234FML00X',
+            'ak_version': 'ak/SUNW,maguro_plus@2013.06.05.8.40,1-1.1',
+            'os_version': 'SunOS 5.11 11.4.40',
+        }},
+    }
+
+
+def datasets() -> dict:
+    names = (
+        'cpu.utilization', 'io.ops[disk]', 'io.ops[op]', 'nfs3.ops',
+        'nfs4.ops', 'smb.ops', 'arc.accesses[hit/miss]',
+        'nic.kilobytes[device]')
+    return {'datasets': [{
+        'name': name,
+        'href': f'/api/analytics/v2/datasets/{name}',
+        'grouping': name.split('.')[0],
+        'explanation': name,
+        'incore': 1048576,
+        'size': 52428800,
+        'suspended': name == 'smb.ops',
+        'activity': 'none',
+    } for name in names]}
+
+
+def analytics(dataset: str, n: int) -> dict:
+    if '[' not in dataset:
+        return {'data': {'data': {'value': 42}}}
+    if dataset.endswith('[op]'):
+        keys = ['read', 'write']
+    else:
+        keys = [f'c0t5000CCA{i:07X}d0' for i in range(n)]
+    items = [{'key': key, 'value': 10 + i % 90} for i, key in enumerate(keys)]
+    return {'data': {'data': {
+        'value': sum(item['value'] for item in items),
+        'data': items,
+    }}}
+
+
+def analytics_samples(dataset: str, n: int, seconds: int,
+                      now: float | None = None) -> dict:
+    """Per-second samples with a spike of 30 seconds in the middle."""
+    now = time.time() if now is None else now
+    samples = []
+    for second in range(seconds):
+        sample = analytics(dataset, n)['data']
+        spike = seconds // 2 <= second < seconds // 2 + 30
+        if spike:
+            sample['data']['value'] *= 2
+            for item in sample['data'].get('data', ()):
+                item['value'] *= 2
+        samples.append({
+            'data': sample['data'],
+            'samples': 1,
+            'startTime': time.strftime(
+                '%Y%m%dT%H:%M:%S', time.gmtime(now - seconds + second)),
+        })
+    return {'data': samples}
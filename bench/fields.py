@@ -0,0 +1,101 @@
+"""Per-item cost of the LUN, problem and alert transforms; the hand-written
+transforms (with dateutil) against the compiled schemas.
+
+Usage: python -m bench.fields [number of items]
+"""
+import copy
+import sys
+import timeit
+from dateutil import parser
+from lib.check.problems import PROBLEMS
+from lib.check.storage import LUNS
+from lib.fields import to_timestamp
+from lib.utils import as_int, as_float
+from .data import luns, problems, alerts
+
+
+def luns_legacy(items: list[dict]) -> list[dict]:
+    out = []
+    for lun in items:
+        usage = lun.get('usage', {})
+        stmfguid = lun.get('stmfguid', lun.get('lunguid'))
+        out.append({
+            'name': lun['canonical_name'],
+            'sparse': lun['sparse'],
+            'volsize': int(lun['volsize']),
+            'volblocksize': int(lun['volblocksize']),
+            'usage_available': as_int(usage, 'available'),
+            'usage_total': as_int(usage, 'total'),
+            'usage_data': as_int(usage, 'data'),
+            'usage_compressratio': as_float(usage, 'compressratio'),
+            'usage_snapshots': as_float(usage, 'snapshots'),
+            'usage_loading': usage.get('loading'),
+            'status': lun.get('status'),
+            'stmfguid': stmfguid,
+        })
+    return out
+
+
+def problems_legacy(items: list[dict]) -> list[dict]:
+    out = []
+    for problem in items:
+        try:
+            timestr = problem.get('diagnosed', problem.get('timestamp'))
+            assert timestr is not None
+            timestamp = int(parser.parse(timestr).timestamp())
+        except Exception:
+            timestamp = None
+        out.append({
+            'name': problem['uuid'],
+            'code': problem['code'],
+            'description': problem['description'],
+            'severity': problem['severity'],
+            'type': problem['type'],
+            'impact': problem.get('impact'),
+            'action': problem.get('action'),
+            'response': problem.get('response'),
+            'repairable': problem.get('repairable'),
+            'timestamp': timestamp,
+        })
+    return out
+
+
+def alerts_legacy(items: list[dict]) -> list[dict]:
+    for log in items:
+        log['timestamp'] = int(parser.parse(log['timestamp']).timestamp())
+        log['name'] = log.pop('uuid')
+    return items
+
+
+def alerts_fast(items: list[dict]) -> list[dict]:
+    for log in items:
+        log['timestamp'] = to_timestamp(log['timestamp'])
+        log['name'] = log.pop('uuid')
+    return items
+
+
+def per_item(func, items: list[dict], copy_items: bool) -> float:
+    # alert transforms modify the items, so these run on a copy; the copy
+    # is excluded from the measured time
+    best = float('inf')
+    for _ in range(5):
+        data = copy.deepcopy(items) if copy_items else items
+        best = min(best, timeit.timeit(lambda: func(data), number=1))
+        to_timestamp.cache_clear()  # measure without earlier memoization
+    return best / len(items) * 1e6
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tests = (
+        ('luns', luns(n)['luns'], luns_legacy, LUNS.convert, False),
+        ('problems', problems(n)['problems'], problems_legacy,
+         PROBLEMS.convert, False),
+        ('alerts', alerts(n)['logs'], alerts_legacy, alerts_fast, True),
+    )
+    print(f'{n} items, time per item in microseconds')
+    for name, items, legacy, fast, copy_items in tests:
+        t0 = per_item(legacy, items, copy_items)
+        t1 = per_item(fast, items, copy_items)
+        print(f'{name:>10}: legacy {t0:7.2f}  schema {t1:7.2f}  '
+              f'({t0 / t1:.1f}x)')
@@ -0,0 +1,207 @@
+"""Local stand-in for the ZFS appliance REST API with synthetic data.
+
+Every port serves one appliance; the amount of data and the latency per
+request are set with Scale. Request statistics are available at /_stats.
+
+Usage: python -m bench.mock [--port 8215] [--appliances 1] [--luns 1000] ...
+
+Use address 127.0.0.1 with `secure: false` and the port in the asset config.
+"""
+import argparse
+import asyncio
+import bisect
+import calendar
+import hashlib
+import json
+import random
+import time
+from collections import Counter
+from typing import NamedTuple
+from aiohttp import web
+from . import data
+
+# Analytics span in seconds
+SPANS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class Scale(NamedTuple):
+    luns: int = 1000
+    alerts: int = 10_000
+    problems: int = 10
+    chassis: int = 4
+    interfaces: int = 4
+    disks: int = 48  # keys in analytics breakdowns by disk
+    pools: int = 2
+    projects: int = 10  # per pool
+    filesystems: int = 20  # per project
+    latency: float = 0.0  # seconds per request
+    jitter: float = 0.0  # random extra latency in seconds
+    etag: bool = False  # support conditional requests
+    cluster: bool = False  # clustered head; owns the even numbered pools
+
+
+class MockAppliance:
+
+    def __init__(self, scale: Scale):
+        self.scale = scale
+        self.stats: Counter[str] = Counter()
+        self._tokens: set[str] = set()
+        self._bodies: dict[str, bytes] = {}
+        self._etags: dict[str, str] = {}
+
+        self._add('storage/luns', data.luns(scale.luns))
+        self._add('problem/problems', data.problems(scale.problems))
+        self._add('hardware/chassis', data.chassis(scale.chassis))
+        self._add('storage/pools', data.pools(scale.pools))
+        self._add('hardware/cluster', data.cluster(
+            'zfs', 'zfs-peer', scale.pools) if scale.cluster else
+            {'cluster': {'state': 'AKCS_UNCONFIGURED', 'resources': []}})
+        self._add('analytics/datasets', data.datasets())
+        for key, body in data.network(scale.interfaces).items():
+            self._add(f'network/{key}', body)
+        for key, body in data.system('zfs').items():
+            self._add(f'system/{key}', body)
+
+        # alerts sorted by timestamp for filtering on `start`
+        logs = data.alerts(scale.alerts)['logs']
+        self._alerts = sorted(
+            (calendar.timegm(
+                time.strptime(log['timestamp'], '%Y%m%dT%H:%M:%S')),
+             json.dumps(log))
+            for log in logs)
+        self._alert_ts = [ts for ts, _ in self._alerts]
+
+    def _add(self, key: str, body: dict):
+        raw = json.dumps(body).encode()
+        self._bodies[key] = raw
+        self._etags[key] = f'"{hashlib.md5(raw).hexdigest()}"'
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/_stats', self._on_stats)
+        app.router.add_post('/api/access/{version}', self._on_login)
+        app.router.add_get(
+            '/api/{api}/{version}/{path:.*}', self._on_get)
+        return app
+
+    async def _delay(self):
+        delay = self.scale.latency + random.random() * self.scale.jitter
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def _on_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def _on_login(self, request: web.Request) -> web.Response:
+        self.stats['requests'] += 1
+        self.stats['logins'] += 1
+        await self._delay()
+        token = f'{random.getrandbits(64):016x}'
+        self._tokens.add(token)
+        return web.Response(status=201, headers={'X-Auth-Session': token})
+
+    async def _on_get(self, request: web.Request) -> web.StreamResponse:
+        api = request.match_info['api']
+        path = request.match_info['path']
+        self.stats['requests'] += 1
+        self.stats[f'requests:{api}'] += 1
+        await self._delay()
+
+        if request.headers.get('X-Auth-Session') not in self._tokens:
+            return web.Response(status=401)
+
+        key = f'{api}/{path}'
+        if key == 'log/logs/alert':
+            body = self._get_alerts(request.query.get('start'))
+        elif api == 'analytics' and path.startswith('datasets/'):
+            dataset = path.split('/')[1]
+            if request.query.get('granularity') == 'second':
+                body = json.dumps(data.analytics_samples(
+                    dataset, self.scale.disks,
+                    self._seconds(request.query))).encode()
+            else:
+                body = json.dumps(
+                    data.analytics(dataset, self.scale.disks)).encode()
+        elif api == 'storage' and path.startswith('pools/'):
+            body = self._get_pool(path.split('/'))
+            if body is None:
+                return web.json_response({'fault': {
+                    'code': 404, 'message': 'not found'}}, status=404)
+        elif key in self._bodies:
+            body = self._bodies[key]
+            etag = self._etags[key]
+            if self.scale.etag:
+                if request.headers.get('If-None-Match') == etag:
+                    self.stats['not_modified'] += 1
+                    return web.Response(status=304)
+        else:
+            return web.json_response({'fault': {
+                'code': 404, 'message': 'not found'}}, status=404)
+
+        self.stats['bytes'] += len(body)
+        headers = {'ETag': self._etags[key]} \
+            if self.scale.etag and key in self._etags else None
+        return web.Response(
+            body=body, content_type='application/json', headers=headers)
+
+    @staticmethod
+    def _seconds(query) -> int:
+        span = SPANS[query.get('span', 'minute')]
+        start = query.get('startTime')
+        if not start:
+            return span
+        ts = calendar.timegm(time.strptime(start, '%Y%m%dT%H:%M:%S'))
+        return max(0, min(span, int(time.time() - ts)))
+
+    def _get_pool(self, parts: list[str]) -> bytes | None:
+        if len(parts) == 3 and parts[2] == 'projects':
+            return json.dumps(
+                data.projects(parts[1], self.scale.projects)).encode()
+        if len(parts) == 5 and parts[4] == 'filesystems':
+            return json.dumps(data.filesystems(
+                parts[1], parts[3], self.scale.filesystems)).encode()
+
+    def _get_alerts(self, start: str | None) -> bytes:
+        idx = 0
+        if start:
+            ts = calendar.timegm(time.strptime(start, '%Y-%m-%dT%H:%M:%SZ'))
+            idx = bisect.bisect_left(self._alert_ts, ts)
+        logs = ', '.join(log for _, log in self._alerts[idx:])
+        return f'{{"logs": [{logs}]}}'.encode()
+
+
+async def serve(scale: Scale, ports: list[int]) -> web.AppRunner:
+    runner = web.AppRunner(MockAppliance(scale).app(), access_log=None)
+    await runner.setup()
+    for port in ports:
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    for field, default in Scale._field_defaults.items():
+        name = f'--{field}'
+        if isinstance(default, bool):
+            parser.add_argument(name, action='store_true')
+        else:
+            parser.add_argument(name, type=type(default), default=default)
+
+
+def scale_from_args(args: argparse.Namespace) -> Scale:
+    return Scale(**{field: getattr(args, field) for field in Scale._fields})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8215)
+    parser.add_argument('--appliances', type=int, default=1)
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    async def main():
+        ports = list(range(args.port, args.port + args.appliances))
+        await serve(scale_from_args(args), ports)
+        print(f'mock appliance(s) on 127.0.0.1, ports {ports}')
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
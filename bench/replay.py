@@ -0,0 +1,59 @@
+"""Runs every check against a recorded archive (see lib/archive.py) and
+reports the duration, the number of items per type and the errors.
+
+Usage: python -m bench.replay <archive> [--speed 0] [--rounds 1]
+
+Record an archive with the RECORD environment variable, for example during a
+dry-run against the appliance. With --speed 0 (default) the responses are
+served without the recorded delays, so only the probe side is measured;
+Use --speed 1 for the recorded timing.
+"""
+import argparse
+import asyncio
+import time
+from libprobe.asset import Asset
+from lib import archive
+from lib.connector import close_sessions
+from main import checks
+
+LOCAL_CONFIG = {'username': 'replay', 'password': 'replay'}
+
+
+async def replay(args: argparse.Namespace):
+    config = {
+        'address': 'replay',
+        'secure': False,
+        '_interval': args.interval,
+        'per_second': args.per_second,
+    }
+    for _ in range(args.rounds):
+        for check in checks:
+            asset = Asset(1, 'replay', check.key)
+            start = time.perf_counter()
+            try:
+                result = await check.run(asset, LOCAL_CONFIG, config)
+            except Exception as e:
+                result = getattr(e, 'result', None) or {}
+                error = str(e) or type(e).__name__
+            else:
+                error = ''
+            duration = time.perf_counter() - start
+            items = ', '.join(
+                f'{name}: {len(items)}' for name, items in result.items())
+            print(f'{check.key:>10} {duration * 1e3:8.1f} ms  {items}'
+                  f'{"  error: " + error if error else ""}')
+    await close_sessions()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('archive')
+    parser.add_argument('--speed', type=float, default=0.0)
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--interval', type=int, default=300)
+    parser.add_argument('--per-second', action='store_true')
+    args = parser.parse_args()
+
+    archive.REPLAY = args.archive
+    archive.REPLAY_SPEED = args.speed
+    asyncio.run(replay(args))
@@ -0,0 +1,145 @@
+"""Runs every check from main.py against N mock appliances and reports the
+latency percentiles per check, requests, bytes and the peak RSS.
+
+Usage: python -m bench.run [--appliances 10] [--rounds 3] [--luns 1000] ...
+
+The mock appliances run in a separate process so the peak RSS is the RSS of
+the probe part only. Each round runs all checks for all appliances at once.
+"""
+import aiohttp
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import time
+from collections import defaultdict
+from libprobe.asset import Asset
+from libprobe.check import Check
+from lib.connector import close_sessions
+from main import checks
+from .mock import Scale, serve, add_scale_arguments, scale_from_args
+
+LOCAL_CONFIG = {'username': 'bench', 'password': 'bench'}
+
+
+def _mock_process(scale: Scale, ports: list[int], ready):
+    async def main():
+        await serve(scale, ports)
+        ready.set()
+        await asyncio.Event().wait()
+    asyncio.run(main())
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def run_check(check: type[Check], asset: Asset, config: dict,
+                    timeout: float) -> tuple[float, bool]:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            check.run(asset, LOCAL_CONFIG, config), timeout=timeout)
+        ok = True
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+async def bench(args: argparse.Namespace, check_classes: list[type[Check]],
+                ports: list[int]) -> dict:
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    assets = [
+        (Asset(port, f'zfs-{port}', ''), {
+            'address': '127.0.0.1',
+            'port': port,
+            'secure': False,
+            '_interval': args.interval,
+        }) for port in ports]
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        tasks = [
+            (check.key, run_check(
+                check, asset._replace(check=check.key), config,
+                args.timeout))
+            for asset, config in assets
+            for check in check_classes]
+        results = await asyncio.gather(*(coro for _, coro in tasks))
+        for (key, _), (duration, ok) in zip(tasks, results):
+            latencies[key].append(duration)
+            if not ok:
+                errors[key] += 1
+    duration = time.perf_counter() - start
+
+    await close_sessions()
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f'http://127.0.0.1:{ports[0]}/_stats') as r:
+            stats = await r.json()
+
+    return {
+        'duration': duration,
+        'latencies': latencies,
+        'errors': errors,
+        'stats': stats,
+        'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def report(result: dict):
+    print(f'{"check":<12} {"p50":>8} {"p90":>8} {"p99":>8} '
+          f'{"max":>8} {"errors":>7}   (latency in ms)')
+    for key, values in sorted(result['latencies'].items()):
+        p50, p90, p99 = (percentile(values, p) for p in (.5, .9, .99))
+        print(f'{key:<12} {p50 * 1e3:8.1f} {p90 * 1e3:8.1f} '
+              f'{p99 * 1e3:8.1f} {max(values) * 1e3:8.1f} '
+              f'{result["errors"][key]:7d}')
+
+    stats = result['stats']
+    print()
+    print(f'duration:  {result["duration"]:.2f} s')
+    print(f'requests:  {stats.get("requests", 0)} '
+          f'(logins: {stats.get("logins", 0)}, '
+          f'304: {stats.get("not_modified", 0)})')
+    print(f'bytes:     {stats.get("bytes", 0) / 1e6:.1f} MB')
+    print(f'peak RSS:  {result["rss"] / 1e6:.1f} MB')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=18215)
+    parser.add_argument('--appliances', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--interval', type=int, default=300)
+    parser.add_argument('--timeout', type=float, default=240.0)
+    parser.add_argument(
+        '--checks', help='comma separated check keys (default: all)')
+    parser.add_argument(
+        '--json', action='store_true', help='output the result as JSON')
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    check_classes: list[type[Check]] = [
+        check for check in checks
+        if not args.checks or check.key in args.checks.split(',')]
+    ports = list(range(args.port, args.port + args.appliances))
+
+    ready = multiprocessing.Event()
+    mock = multiprocessing.Process(
+        target=_mock_process,
+        args=(scale_from_args(args), ports, ready),
+        daemon=True)
+    mock.start()
+    ready.wait()
+    try:
+        result = asyncio.run(bench(args, check_classes, ports))
+    finally:
+        mock.terminate()
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        report(result)
@@ -0,0 +1,77 @@
+"""Scaling curve of the worker mode (WORKERS environment variable).
+
+Runs every check for N mock appliances with 0 (no worker processes), 1, 2,
+... workers and reports the duration and the number of checks per second.
+
+Usage: python -m bench.shard [--appliances 40] [--workers 0,1,2,4] ...
+
+The mock appliances are divided over a number of processes so the mock is
+not the bottleneck; On a machine with few cores the curve flattens early.
+"""
+import argparse
+import asyncio
+import multiprocessing
+from lib.shard import WorkerPool
+from main import checks
+from .mock import add_scale_arguments, scale_from_args
+from .run import _mock_process, bench
+
+
+async def measure(args: argparse.Namespace, workers: int,
+                  ports: list[int]) -> tuple[float, int]:
+    check_classes = checks
+    pool = None
+    if workers:
+        pool = WorkerPool(workers, checks)
+        pool.start()
+        check_classes = pool.wrap(checks)
+
+    try:
+        # warm-up; logins and starting the workers are not measured
+        await bench(argparse.Namespace(**{**vars(args), 'rounds': 1}),
+                    list(check_classes), ports)
+        result = await bench(args, list(check_classes), ports)
+    finally:
+        if pool is not None:
+            await pool.close()
+    return result['duration'], sum(result['errors'].values())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=18215)
+    parser.add_argument('--appliances', type=int, default=40)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--interval', type=int, default=300)
+    parser.add_argument('--timeout', type=float, default=240.0)
+    parser.add_argument('--workers', default='0,1,2,4')
+    parser.add_argument('--mock-processes', type=int, default=4)
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    ports = list(range(args.port, args.port + args.appliances))
+    scale = scale_from_args(args)
+    mocks = []
+    for i in range(args.mock_processes):
+        ready = multiprocessing.Event()
+        mock = multiprocessing.Process(
+            target=_mock_process,
+            args=(scale, ports[i::args.mock_processes], ready),
+            daemon=True)
+        mock.start()
+        ready.wait()
+        mocks.append(mock)
+
+    n = args.appliances * args.rounds * len(checks)
+    print(f'{"workers":>7} {"duration":>9} {"checks/s":>9} {"speedup":>8} '
+          f'{"errors":>7}')
+    base = None
+    try:
+        for workers in map(int, args.workers.split(',')):
+            duration, errors = asyncio.run(measure(args, workers, ports))
+            base = base or duration
+            print(f'{workers:7d} {duration:8.2f}s {n / duration:9.1f} '
+                  f'{base / duration:7.2f}x {errors:7d}')
+    finally:
+        for mock in mocks:
+            mock.terminate()
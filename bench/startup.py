@@ -0,0 +1,75 @@
+"""Import time report for the probe start-up.
+
+Imports main.py in a fresh interpreter (python -X importtime) and shows the
+total time and the slowest modules, followed by the import time per check
+module as loaded on first use by lib/registry.py.
+
+Usage: python -m bench.startup [--top 15] [--budget 250]
+
+With --budget (ms) the exit code is 1 when importing main.py takes longer,
+so this can be used as a start-up time test.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+LOAD_CHECKS = '''
+import json, time
+start = time.perf_counter()
+import main
+from lib.registry import CHECKS, import_times, load
+main_time = time.perf_counter() - start
+for _, path in CHECKS:
+    load(path)
+print(json.dumps({'main': main_time, 'checks': import_times}))
+'''
+
+
+def import_times() -> tuple[float, list[tuple[float, str]]]:
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        capture_output=True, text=True, check=True)
+    modules, pending, total = [], [], 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            pending.append((int(cumulative) / 1e6, name.strip()))
+        elif depth == 0:
+            # nested imports are listed before the module importing them
+            if name.strip() == 'main':
+                total, modules = int(cumulative) / 1e6, pending
+            pending = []
+    return total, sorted(modules, reverse=True)
+
+
+def check_times() -> dict:
+    proc = subprocess.run(
+        [sys.executable, '-c', LOAD_CHECKS],
+        capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget', type=float, help='budget in ms')
+    args = parser.parse_args()
+
+    total, modules = import_times()
+    print(f'import main: {total * 1e3:.1f} ms')
+    for duration, name in modules[:args.top]:
+        print(f'  {duration * 1e3:8.1f} ms  {name}')
+
+    times = check_times()
+    print(f'\ncheck modules on first use '
+          f'(after import main: {times["main"] * 1e3:.1f} ms):')
+    for name, duration in times['checks'].items():
+        print(f'  {duration * 1e3:8.1f} ms  {name}')
+
+    if args.budget is not None and total * 1e3 > args.budget:
+        print(f'\nimport main exceeds the budget of {args.budget} ms')
+        sys.exit(1)
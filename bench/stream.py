@@ -0,0 +1,61 @@
+"""Compares peak memory of decoding a complete response with json.loads()
+against the streaming ItemStream parser.
+
+Usage: python -m bench.stream [number of LUNs]
+"""
+import json
+import sys
+import time
+import tracemalloc
+from lib.jsonstream import ItemStream
+from lib.utils import CHUNK_SIZE
+from .data import luns
+
+
+def transform(lun: dict) -> dict:
+    return {
+        'name': lun['canonical_name'],
+        'volsize': int(lun['volsize']),
+        'status': lun.get('status'),
+    }
+
+
+def full(chunks: list[bytes]) -> list[dict]:
+    data = json.loads(b''.join(chunks))
+    return [transform(lun) for lun in data['luns']]
+
+
+def streaming(chunks: list[bytes]) -> list[dict]:
+    stream = ItemStream('luns')
+    out = []
+    for chunk in chunks:
+        out.extend(transform(lun) for lun in stream.feed(chunk))
+    out.extend(transform(lun) for lun in stream.close())
+    return out
+
+
+def measure(func, chunks: list[bytes]) -> tuple[float, int]:
+    start = time.perf_counter()
+    func(chunks)
+    duration = time.perf_counter() - start
+
+    # tracing slows down, so measure memory in a separate run
+    tracemalloc.start()
+    func(chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    body = json.dumps(luns(n)).encode()
+    chunks = [
+        body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+    del body
+
+    print(f'{n} LUNs, {sum(map(len, chunks)) / 1e6:.1f} MB body')
+    for func in (full, streaming):
+        duration, peak = measure(func, chunks)
+        print(f'{func.__name__:>10}: {duration * 1e3:8.1f} ms, '
+              f'peak {peak / 1e6:7.1f} MB')
@@ -0,0 +1,69 @@
+from array import array
+from typing import NamedTuple
+
+
+class Stats(NamedTuple):
+    min: float
+    avg: float
+    max: float
+    p95: float
+
+
+def summarize(values: array) -> Stats:
+    """Returns the statistics for a non-empty array of values; The 95th
+    percentile uses the nearest rank."""
+    ordered = sorted(values)
+    n = len(ordered)
+    return Stats(
+        ordered[0],
+        sum(ordered) / n,
+        ordered[-1],
+        ordered[max(0, -(-95 * n // 100) - 1)])
+
+
+def aggregate(samples: list[dict]) -> tuple[Stats | None, dict[str, Stats]]:
+    """Reduces per-second analytics samples to statistics for the total and
+    for each key of the breakdown.
+
+    Each sample is like {'data': {'value': 5, 'data': [{'key': .., 'value':
+    ..}]}}. A key which is missing in a sample is taken as zero as the
+    appliance leaves out keys without activity.
+    """
+    n = len(samples)
+    if not n:
+        return None, {}
+
+    totals = array('d', bytes(8 * n))
+    keys: dict[str, array] = {}
+    for i, sample in enumerate(samples):
+        data = sample['data']
+        totals[i] = data['value']
+        for obj in data.get('data', ()):
+            values = keys.get(obj['key'])
+            if values is None:
+                values = keys[obj['key']] = array('d', bytes(8 * n))
+            values[i] = obj['value']
+
+    return summarize(totals), {
+        key: summarize(values) for key, values in keys.items()}
+
+
+def int_fields(name: str, stats: Stats) -> dict[str, int]:
+    """Returns check item fields for statistics; The average is used as
+    value for `name` so the metric is the same as with a single sample."""
+    return {
+        name: round(stats.avg),  # int
+        f'{name}_min': round(stats.min),  # int
+        f'{name}_max': round(stats.max),  # int
+        f'{name}_p95': round(stats.p95),  # int
+    }
+
+
+def float_fields(name: str, stats: Stats) -> dict[str, float]:
+    """Like int_fields() but without rounding."""
+    return {
+        name: stats.avg,  # float
+        f'{name}_min': stats.min,  # float
+        f'{name}_max': stats.max,  # float
+        f'{name}_p95': stats.p95,  # float
+    }
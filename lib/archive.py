@@ -0,0 +1,321 @@
+"""Record and replay of appliance responses.
+
+With the RECORD environment variable set to a directory, every response is
+appended to an archive per asset (`<asset id>.rec`) with the status, a few
+headers, the body and the timing. With REPLAY set to such an archive, no
+requests are made and the checks are served from the archive instead; Use
+REPLAY_SPEED to replay faster (for example 10) or without delays (0).
+
+An archive is a stream of msgpack maps with a zlib compressed body so it can
+be appended to while the probe is running. The responses are compressed and
+written by a single thread so recording does not block the event loop.
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, AsyncIterator, BinaryIO, Mapping, NamedTuple
+from urllib.parse import parse_qsl, urlsplit
+import aiohttp
+import msgpack
+from . import metrics
+
+RECORD = os.getenv('RECORD', '')
+REPLAY = os.getenv('REPLAY', '')
+REPLAY_SPEED = float(os.getenv('REPLAY_SPEED', '1'))
+
+# Recording for an asset stops when the archive exceeds this size in bytes
+MAX_ARCHIVE_SIZE = 500_000_000
+
+# Response headers kept in the archive; The session token is replaced
+HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'X-Auth-Session')
+REPLAY_TOKEN = 'replay'
+
+_full: set[str] = set()
+
+# Responses waiting for the writer thread and the open archives by file name;
+# The archives are only used by the writer thread
+_queue: queue.Queue[tuple[int, 'Entry']] = queue.Queue()
+_writer: threading.Thread | None = None
+_files: dict[str, BinaryIO] = {}
+
+
+class Entry(NamedTuple):
+    ts: float  # time-stamp of the request
+    method: str
+    path: str  # including the query
+    status: int
+    reason: str
+    headers: dict[str, str]
+    body: bytes
+    ttfb: float  # seconds until the response status is received
+    duration: float  # seconds until the body is received
+
+
+def _pack(entry: Entry) -> bytes:
+    data = msgpack.packb({
+        **entry._asdict(),
+        'body': zlib.compress(entry.body),
+    })
+    assert data is not None  # only None with autoreset=False
+    return data
+
+
+def read_archive(fn: str) -> list[Entry]:
+    with open(fn, 'rb') as fp:
+        return [
+            Entry(**{**obj, 'body': zlib.decompress(obj['body'])})
+            for obj in msgpack.Unpacker(fp, raw=False)]
+
+
+def _write(asset_id: int, entry: Entry):
+    fn = os.path.join(RECORD, f'{asset_id}.rec')
+    if fn in _full:
+        return
+    try:
+        fp = _files.get(fn)
+        if fp is None:
+            fp = _files[fn] = open(fn, 'ab')
+        fp.write(_pack(entry))
+        size = fp.tell()
+    except Exception as e:
+        logging.warning(f'failed to write `{fn}`: {e}')
+        return
+    if size > MAX_ARCHIVE_SIZE:
+        logging.warning(f'recording stopped; `{fn}` is full')
+        _full.add(fn)
+        _files.pop(fn).close()
+
+
+def _flush_files():
+    for fn, fp in _files.items():
+        try:
+            fp.flush()
+        except Exception as e:
+            logging.warning(f'failed to write `{fn}`: {e}')
+
+
+def _run_writer():
+    while True:
+        asset_id, entry = _queue.get()
+        try:
+            _write(asset_id, entry)
+            if _queue.empty():
+                _flush_files()
+        finally:
+            _queue.task_done()
+
+
+def _record(asset_id: int, entry: Entry):
+    global _writer
+    if _writer is None:
+        _writer = threading.Thread(
+            target=_run_writer, name='archive', daemon=True)
+        _writer.start()
+    _queue.put((asset_id, entry))
+
+
+def flush():
+    """Blocks until all recorded responses are written to the archives."""
+    _queue.join()
+
+
+class _RecordingResponse:
+    """Response which keeps the body as it is read."""
+
+    def __init__(self, resp: aiohttp.ClientResponse):
+        self._resp = resp
+        self.chunks: list[bytes] = []
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self.content = self
+
+    async def read(self) -> bytes:
+        body = await self._resp.read()
+        self.chunks.append(body)
+        return body
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        async for chunk in self._resp.content.iter_chunked(n):
+            self.chunks.append(chunk)
+            yield chunk
+
+
+class _RecordingRequest:
+    def __init__(self, ctx: Any, method: str, url: str,
+                 trace_request_ctx: Mapping[str, Any] | None):
+        self._ctx = ctx
+        self._method = method
+        self._url = url
+        self._asset_id = None if trace_request_ctx is None \
+            else trace_request_ctx['asset_id']
+        self._start = 0.0
+        self._ttfb = 0.0
+        self._resp: _RecordingResponse | None = None
+
+    async def __aenter__(self) -> _RecordingResponse:
+        self._start = time.perf_counter()
+        self._resp = _RecordingResponse(await self._ctx.__aenter__())
+        self._ttfb = time.perf_counter() - self._start
+        return self._resp
+
+    async def __aexit__(self, *exc):
+        resp = self._resp
+        if resp is not None and self._asset_id is not None:
+            url = urlsplit(self._url)
+            headers = {
+                key: resp.headers[key] for key in HEADERS
+                if key in resp.headers}
+            if 'X-Auth-Session' in headers:
+                headers['X-Auth-Session'] = REPLAY_TOKEN
+            _record(self._asset_id, Entry(
+                ts=time.time(),
+                method=self._method,
+                path=f'{url.path}?{url.query}' if url.query else url.path,
+                status=resp.status,
+                reason=resp.reason or '',
+                headers=headers,
+                body=b''.join(resp.chunks),
+                ttfb=self._ttfb,
+                duration=time.perf_counter() - self._start))
+        return await self._ctx.__aexit__(*exc)
+
+
+class RecordingSession:
+    """Session which writes every response to the archive of the asset;
+    Requests must pass a mapping with `asset_id` as `trace_request_ctx` to be
+    recorded."""
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self._session = session
+
+    @property
+    def closed(self) -> bool:
+        return self._session.closed
+
+    def get(self, url: str, **kwargs) -> _RecordingRequest:
+        return _RecordingRequest(
+            self._session.get(url, **kwargs), 'GET', url,
+            kwargs.get('trace_request_ctx'))
+
+    def post(self, url: str, **kwargs) -> _RecordingRequest:
+        return _RecordingRequest(
+            self._session.post(url, **kwargs), 'POST', url,
+            kwargs.get('trace_request_ctx'))
+
+    async def close(self):
+        await self._session.close()
+        await asyncio.get_running_loop().run_in_executor(None, flush)
+
+
+def _key(method: str, path: str) -> tuple:
+    # query values like start times differ for each request; The recorded
+    # responses for a path are served in order
+    path, _, query = path.partition('?')
+    return method, path, tuple(sorted(k for k, _ in parse_qsl(query)))
+
+
+class _ReplayResponse:
+    def __init__(self, entry: Entry, speed: float):
+        self._entry = entry
+        self._speed = speed
+        self.status = entry.status
+        self.reason = entry.reason
+        self.headers = entry.headers
+        self.content = self
+
+    async def _body_delay(self):
+        delay = self._entry.duration - self._entry.ttfb
+        if self._speed and delay > 0:
+            await asyncio.sleep(delay / self._speed)
+
+    async def read(self) -> bytes:
+        await self._body_delay()
+        return self._entry.body
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        await self._body_delay()
+        body = self._entry.body
+        for i in range(0, len(body), n):
+            yield body[i:i + n]
+
+
+class _ReplayRequest:
+    def __init__(self, session: 'ReplaySession', method: str, url: str,
+                 kwargs: dict):
+        self._session = session
+        self._method = method
+        self._url = url
+        self._kwargs = kwargs
+
+    async def __aenter__(self) -> _ReplayResponse:
+        entry = self._session.find(
+            self._method, self._url, self._kwargs.get('headers') or {})
+        speed = self._session.speed
+        if speed and entry.ttfb > 0:
+            await asyncio.sleep(entry.ttfb / speed)
+
+        trace_request_ctx = self._kwargs.get('trace_request_ctx')
+        if trace_request_ctx is not None:
+            asset_id = trace_request_ctx['asset_id']
+            endpoint = trace_request_ctx['endpoint']
+            metrics.add_timing(asset_id, endpoint, 'ttfb', entry.ttfb)
+            metrics.add_request(asset_id, endpoint, entry.status, True)
+        return _ReplayResponse(entry, speed)
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+class ReplaySession:
+    """Session which serves the responses from an archive; The n-th request
+    for a path gets the n-th recorded response, the last one is repeated."""
+
+    def __init__(self, fn: str, speed: float):
+        self.speed = speed
+        self.closed = False
+        self._entries: dict[tuple, list[Entry]] = defaultdict(list)
+        self._served: dict[tuple, int] = defaultdict(int)
+        for entry in read_archive(fn):
+            self._entries[_key(entry.method, entry.path)].append(entry)
+
+    def find(self, method: str, url: str, headers: dict) -> Entry:
+        url_parts = urlsplit(url)
+        path = url_parts.path
+        key = _key(method, f'{path}?{url_parts.query}')
+        entries = self._entries.get(key)
+        if not entries and method == 'POST':
+            # no login recorded, for example when a stored token was used
+            return Entry(0.0, method, path, 201, 'Created', {
+                'X-Auth-Session': REPLAY_TOKEN}, b'', 0.0, 0.0)
+        if not entries:
+            logging.warning(f'no recorded response for {method} {path}')
+            return Entry(
+                0.0, method, path, 404, 'Not Found', {}, b'', 0.0, 0.0)
+
+        idx = min(self._served[key], len(entries) - 1)
+        self._served[key] += 1
+        conditional = \
+            'If-None-Match' in headers or 'If-Modified-Since' in headers
+        if not conditional:
+            # a recorded 304 requires a cached response; Use the previous
+            # (or else the next) complete response instead
+            complete = [
+                i for i, entry in enumerate(entries) if entry.status != 304]
+            if complete and entries[idx].status == 304:
+                idx = min(complete, key=lambda i: (i > idx, abs(i - idx)))
+        return entries[idx]
+
+    def get(self, url: str, **kwargs) -> _ReplayRequest:
+        return _ReplayRequest(self, 'GET', url, kwargs)
+
+    def post(self, url: str, **kwargs) -> _ReplayRequest:
+        return _ReplayRequest(self, 'POST', url, kwargs)
+
+    async def close(self):
+        self.closed = True
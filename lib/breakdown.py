@@ -0,0 +1,41 @@
+import heapq
+from typing import Callable
+
+# Breakdown items are limited with `top_n` (per breakdown) and `max_items`
+# (all breakdowns of a check together) in the asset config; Items which do
+# not fit are rolled up into a single `other` item
+DEF_TOP_N = 0  # disabled
+DEF_MAX_ITEMS = 1000
+
+
+def get_limits(sizes: list[int], config: dict) -> list[int]:
+    """Returns the maximum number of items for breakdowns of the given sizes.
+
+    Small breakdowns are kept complete, the remaining budget is divided
+    equally over the larger breakdowns.
+    """
+    top_n = config.get('top_n', DEF_TOP_N) or None
+    budget = config.get('max_items', DEF_MAX_ITEMS)
+    limits = [0] * len(sizes)
+    remaining = len(sizes)
+    for i in sorted(range(len(sizes)), key=sizes.__getitem__):
+        size = sizes[i] if top_n is None else min(sizes[i], top_n + 1)
+        limit = limits[i] = min(size, max(1, budget // remaining))
+        budget -= limit
+        remaining -= 1
+    return limits
+
+
+def limit_items(items: list[dict], limit: int, value: str,
+                other: Callable[[float, int], dict]) -> list[dict]:
+    """Returns at most `limit` items; When there are more items, the items
+    with the highest `value` are kept and the rest is replaced by the item
+    returned by other(sum of the values, number of items)."""
+    if len(items) <= limit:
+        return items
+
+    top = heapq.nlargest(limit - 1, items, key=lambda item: item[value] or 0)
+    total = sum(item[value] or 0 for item in items)
+    rest = total - sum(item[value] or 0 for item in top)
+    top.append(other(rest, len(items) - len(top)))
+    return top
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+# Maximum total size of the cached response bodies in bytes
+MAX_CACHE_SIZE = 32_000_000
+
+
+class CacheEntry(NamedTuple):
+    expire: float
+    etag: str | None
+    last_modified: str | None
+    size: int
+    data: Any
+
+
+class ResponseCache:
+    """Size bounded LRU cache for decoded responses.
+
+    Cached data is shared between check runs and must not be modified.
+    """
+
+    def __init__(self, max_size: int = MAX_CACHE_SIZE):
+        self._entries: OrderedDict[tuple, CacheEntry] = OrderedDict()
+        self._size = 0
+        self.max_size = max_size
+        self.hits = 0  # served from cache without a request
+        self.not_modified = 0  # served from cache after a 304 response
+        self.misses = 0  # full response
+
+    def get(self, key: tuple) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: tuple, entry: CacheEntry):
+        prev = self._entries.pop(key, None)
+        if prev is not None:
+            self._size -= prev.size
+        if entry.size > self.max_size:
+            return
+
+        self._entries[key] = entry
+        self._size += entry.size
+        while self._size > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'size': self._size,
+            'hits': self.hits,
+            'not_modified': self.not_modified,
+            'misses': self.misses,
+        }
+
+
+response_cache = ResponseCache()
@@ -1,58 +1,71 @@
 import logging
-import aiohttp
-from dateutil import parser
+import time
 from datetime import datetime, timedelta
 from libprobe.asset import Asset
 from libprobe.check import Check
-from libprobe.exceptions import IncompleteResultException
-from ..utils import get_token, DEF_API_VERSION, DEF_SECURE, DEF_PORT
-from ..connector import get_connector
+from ..fields import to_timestamp, to_utc_timestamp
+from ..utils import get_token, iter_data
 
 
 DEF_ALERT_HOURS = 24  # return alers from the past 24 hours
 
+# Alerts are requested from the most recent known alert minus this overlap
+# in seconds; This catches alerts which are logged with some delay.
+ALERT_OVERLAP = 300
+
+# Incremental alert collection; For each asset the parsed alerts within the
+# time window are kept (by uuid, with the UTC time-stamp) together with the
+# most recent alert time-stamp (cursor) so only new alerts must be requested
+# and parsed.
+_windows: dict[int, tuple[int, int, dict[str, tuple[int, dict]]]] = {}
+
 
 async def get_logs_alert(asset: Asset, config: dict, token: str):
-    address = config.get('address')
-    if not address:
-        address = asset.name
-    headers = {'X-Auth-Session': token}
-    api_version = config.get('version', DEF_API_VERSION)
-    secure = config.get('secure', DEF_SECURE)
-    port = config.get('port', DEF_PORT)
     alert_hours = config.get('hours', DEF_ALERT_HOURS)
 
     start = (datetime.utcnow() - timedelta(hours=alert_hours))
-    index = start.isoformat(sep='T', timespec='seconds') + 'Z'
-
-    protocol = 'https' if secure else 'http'
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/log/{api_version}/logs/alert?start={index}'
-    )
+    min_ts = int(time.time()) - alert_hours * 3600
 
-    logging.info(f'GET {url}')
+    hours, cursor, window = _windows.get(asset.id, (alert_hours, 0, {}))
+    if hours != alert_hours:
+        cursor, window = 0, {}
 
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
+    if cursor - ALERT_OVERLAP > min_ts:
+        index = time.strftime(
+            '%Y-%m-%dT%H:%M:%SZ', time.gmtime(cursor - ALERT_OVERLAP))
+    else:
+        index = start.isoformat(sep='T', timespec='seconds') + 'Z'
 
     uuids = set()  # TODO: remove if 100% sure uuids are unique
-    logs = []
     state = {}
 
-    if data:
-        for log in data['logs']:
-            log['timestamp'] = int(parser.parse(log['timestamp']).timestamp())
-            uuid = log.pop('uuid')
+    async for log in iter_data(
+            asset, config, token, 'log', f'logs/alert?start={index}', 'logs'):
+        uuid = log.pop('uuid')
+        if uuid in uuids:
+            logging.error('UUID not unique')
+            continue
+        uuids.add(uuid)
+
+        entry = window.get(uuid)
+        if entry is None:
+            # the cursor is compared with the UTC `start` of the request;
+            # The returned time-stamp is unchanged (local time)
+            ts = to_utc_timestamp(log['timestamp'])
+            log['timestamp'] = to_timestamp(log['timestamp'])
             log['name'] = uuid
-            if uuid in uuids:
-                logging.error('UUID not unique')
-            else:
-                logs.append(log)
-            uuids.add(uuid)
+            entry = window[uuid] = ts, log
+        # alerts kept from a previous (failed) run advance the cursor too
+        cursor = max(cursor, entry[0])
+
+    # alerts in the response are within the window according to the
+    # appliance, others are evicted when they have left the time window
+    window = {
+        uuid: (ts, log) for uuid, (ts, log) in window.items()
+        if uuid in uuids or ts >= min_ts}
+    _windows[asset.id] = alert_hours, cursor, window
+
+    logs = [log for _, log in window.values()]
 
     state['logs'] = logs
     state['records'] = [{
@@ -62,9 +75,6 @@ async def get_logs_alert(asset: Asset, config: dict, token: str):
         'hours': alert_hours,
     }]
 
-    if len(logs) != len(uuids):
-        raise IncompleteResultException('UUIDs are not unique', result=state)
-
     return state
 
 
@@ -0,0 +1,117 @@
+from typing import Sequence
+from libprobe.asset import Asset
+from libprobe.check import Check
+from ..aggregate import aggregate, float_fields
+from ..breakdown import get_limits, limit_items
+from ..utils import get_token, get_data, get_analytics, get_analytics_samples
+from ..utils import gather_named, raise_incomplete
+
+
+# Datasets when not given with `datasets` in the asset config
+DEF_DATASETS = (
+    'nfs3.ops',
+    'nfs4.ops',
+    'smb.ops',
+    'iscsi.ops',
+    'arc.accesses[hit/miss]',
+    'nic.kilobytes[device]',
+)
+
+# The list of datasets on the appliance is cached; Datasets which are
+# unknown or suspended are not requested until the list is refreshed
+DEF_CACHE_TTL = 3600  # seconds, re-validated afterwards when supported
+
+
+async def get_available(asset: Asset, config: dict, token: str,
+                        datasets: Sequence[str]
+                        ) -> tuple[list[str], list[dict]]:
+    cache_ttl = config.get('datasets_cache_ttl', DEF_CACHE_TTL)
+    data = await get_data(
+        asset, config, token, 'analytics', 'datasets', cache_ttl)
+    suspended = {
+        obj['name']: bool(obj.get('suspended'))
+        for obj in data['datasets']}
+
+    available, unavailable = [], []
+    for dataset in datasets:
+        if dataset not in suspended:
+            unavailable.append({
+                'name': dataset,  # str
+                'reason': 'unknown',  # str
+            })
+        elif suspended[dataset]:
+            unavailable.append({
+                'name': dataset,  # str
+                'reason': 'suspended',  # str
+            })
+        else:
+            available.append(dataset)
+    return available, unavailable
+
+
+async def get_minute(asset: Asset, config: dict, token: str,
+                     dataset: str) -> tuple[dict, list[dict]]:
+    data = (await get_analytics(asset, config, token, dataset))['data']['data']
+    return {'value': float(data['value'])}, [
+        {'key': obj['key'], 'value': float(obj['value'])}  # str, float
+        for obj in data.get('data', ())]
+
+
+async def get_seconds(asset: Asset, config: dict, token: str,
+                      dataset: str) -> tuple[dict, list[dict]]:
+    samples = await get_analytics_samples(asset, config, token, dataset)
+    total, keys = aggregate(samples)
+    assert total is not None, f'no analytics samples for {dataset}'
+    return float_fields('value', total), [
+        {'key': key, **float_fields('value', stats)}  # str, float
+        for key, stats in keys.items()]
+
+
+async def get_generic_analytics(asset: Asset, config: dict, token: str):
+    datasets = config.get('datasets') or DEF_DATASETS
+    available, unavailable = \
+        await get_available(asset, config, token, datasets)
+
+    fetch = get_seconds if config.get('per_second') else get_minute
+    data, errors = await gather_named(asset, {
+        dataset: fetch(asset, config, token, dataset)
+        for dataset in available}) if available else ({}, {})
+
+    items, breakdown = [], []
+    limits = get_limits([len(keys) for _, keys in data.values()], config)
+    for (dataset, (value, keys)), limit in zip(data.items(), limits):
+        items.append({
+            'name': dataset,  # str
+            **value,  # float
+        })
+        breakdown.extend(limit_items([{
+            'name': f'{dataset}:{obj["key"]}',  # str
+            'dataset': dataset,  # str
+            **obj,  # str, float
+        } for obj in keys], limit, 'value', lambda rest, n: {
+            'name': f'{dataset}:other',  # str
+            'dataset': dataset,  # str
+            'key': 'other',  # str
+            'value': rest,  # float
+            'keys': n,  # int (only for the `other` item)
+        }))
+
+    state = {
+        'datasets': items,
+        'breakdown': breakdown,
+        'unavailable': unavailable,
+    }
+    raise_incomplete(errors, state)
+    return state
+
+
+class CheckAnalytics(Check):
+    key = 'analytics'
+    unchanged_eol = 0
+
+    @staticmethod
+    async def run(asset: Asset, local_config: dict, config: dict) -> dict:
+
+        token = await get_token(asset, local_config, config)
+        state = await get_generic_analytics(asset, config, token)
+        return state
@@ -1,7 +1,23 @@
 import logging
 from libprobe.asset import Asset
 from libprobe.check import Check
-from ..utils import get_token, get_analytics
+from ..aggregate import aggregate, int_fields
+from ..utils import get_token, get_analytics, get_analytics_samples
+
+
+async def get_cpu_samples(asset: Asset, config: dict, token: str):
+    dataset = 'cpu.utilization'
+    samples = await get_analytics_samples(asset, config, token, dataset)
+    total, _ = aggregate(samples)
+    assert total is not None, 'no analytics samples for cpu.utilization'
+
+    items = [{
+        'name': 'cpu.utilization',  # str
+        **int_fields('percentage', total),  # int
+    }]
+
+    state = {'utilization': items}
+    return state
 
 
 async def get_cpu_analytics(asset: Asset, config: dict, token: str):
@@ -28,5 +44,8 @@ class CheckCpu(Check):
     async def run(asset: Asset, local_config: dict, config: dict) -> dict:
 
         token = await get_token(asset, local_config, config)
-        state = await get_cpu_analytics(asset, config, token)
+        if config.get('per_second'):
+            state = await get_cpu_samples(asset, config, token)
+        else:
+            state = await get_cpu_analytics(asset, config, token)
         return state
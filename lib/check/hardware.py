@@ -1,58 +1,53 @@
-import logging
-import aiohttp
 from libprobe.asset import Asset
 from libprobe.check import Check
-from ..utils import get_token, DEF_API_VERSION, DEF_SECURE, DEF_PORT
-from ..connector import get_connector
+from ..cluster import Topology, get_topology
+from ..fields import Field, Schema
+from ..utils import get_token, get_data
 
 
-async def get_hardware(asset: Asset, config: dict, token: str):
-    address = config.get('address')
-    if not address:
-        address = asset.name
-    headers = {'X-Auth-Session': token}
-    api_version = config.get('version', DEF_API_VERSION)
-    secure = config.get('secure', DEF_SECURE)
-    port = config.get('port', DEF_PORT)
+# Chassis state is re-validated on each run when the appliance supports this;
+# Set `state_cache_ttl` in the asset config to re-use it for some seconds
+DEF_CACHE_TTL = 0
 
-    protocol = 'https' if secure else 'http'
+CHASSIS = Schema(
+    Field('name', 'name'),  # str
+    Field('faulted', 'faulted'),  # bool
+    Field('manufacturer', 'manufacturer'),  # str
+    Field('model', 'model'),  # str
+    Field('serial', 'serial'),  # str
+    Field('type', 'type'),  # str
+    Field('rpm', 'rpm', None, True),  # int?
+    Field('part', 'part', None, True),  # str?
+    Field('locate', 'locate', None, True),  # bool?
+)
 
+
+async def get_hardware(asset: Asset, config: dict, token: str,
+                       topology: Topology):
     ##############################
     # Chassis
     ##############################
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/hardware/{api_version}/chassis'
-    )
-    logging.info(f'GET {url}')
+    cache_ttl = config.get('state_cache_ttl', DEF_CACHE_TTL)
+    data = await get_data(
+        asset, config, token, 'hardware', 'chassis', cache_ttl)
 
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
+    # disk shelves are shared by both heads of a cluster and are reported by
+    # the primary head only; Both heads are primary when the topology is not
+    # known (see get_topology())
+    sources = [
+        source for source in data['chassis']
+        if topology.primary or source.get('type') == 'system']
 
     names = set()
-    chassis = []
-    for item in data['chassis']:
+    chassis = CHASSIS.convert(sources)
+    for item, source in zip(chassis, sources):
         name = item['name']
         if name in names:
-            name = item['href']  # this is unique and never equal to a name
+            # this is unique and never equal to a name
+            item['name'] = source['href']
         else:
             names.add(name)
 
-        chassis.append({
-            'name': name,  # str
-            'faulted': item['faulted'],  # bool
-            'manufacturer': item['manufacturer'],  # str
-            'model': item['model'],  # str
-            'serial': item['serial'],  # str
-            'type': item['type'],  # str
-            'rpm': item.get('rpm'),  # int?
-            'part': item.get('part'),  # str?
-            'locate': item.get('locate'),  # bool?
-        })
-
     return {'chassis': chassis}
 
 
@@ -64,5 +59,6 @@ class CheckHardware(Check):
     async def run(asset: Asset, local_config: dict, config: dict) -> dict:
 
         token = await get_token(asset, local_config, config)
-        state = await get_hardware(asset, config, token)
+        topology = await get_topology(asset, config, token)
+        state = await get_hardware(asset, config, token, topology)
         return state
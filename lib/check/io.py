@@ -1,49 +1,92 @@
 import logging
 from libprobe.asset import Asset
 from libprobe.check import Check
-from ..utils import get_token, get_analytics
+from ..aggregate import Stats, aggregate, int_fields
+from ..breakdown import get_limits, limit_items
+from ..utils import get_token, get_analytics, get_analytics_samples
+from ..utils import gather_named, raise_incomplete
 
 
-async def get_io_analytics(asset: Asset, config: dict, token: str):
+DATASETS = ('io.ops[disk]', 'io.ops[op]')
+
+
+def limit_disks(ops_disk: list[dict], config: dict) -> list[dict]:
+    limit, = get_limits([len(ops_disk)], config)
+    return limit_items(ops_disk, limit, 'ops', lambda rest, n: {
+        'name': 'other',  # str
+        'ops': round(rest),  # int
+        'keys': n,  # int (only for the `other` item)
+    })
+
+
+async def get_io_samples(asset: Asset, config: dict, token: str):
+    samples, errors = await gather_named(asset, {
+        dataset: get_analytics_samples(asset, config, token, dataset)
+        for dataset in DATASETS})
+    state = {}
+
     # I/O operations per second broken down by disk
-    dataset = 'io.ops[disk]'
-    data = await get_analytics(asset, config, token, dataset)
+    if 'io.ops[disk]' in samples:
+        _, keys = aggregate(samples['io.ops[disk]'])
+        ops_disk = [{
+            'name': key,  # str
+            **int_fields('ops', stats),  # int
+        } for key, stats in keys.items()]
+        state['ops_disk'] = limit_disks(ops_disk, config)
+
+    # I/O operations per second broken down by type of operation
+    if 'io.ops[op]' in samples:
+        _, keys = aggregate(samples['io.ops[op]'])
+        zero = Stats(0.0, 0.0, 0.0, 0.0)
+        state['ops_op'] = [{
+            'name': 'io.ops[op]',
+            **int_fields('read', keys.get('read', zero)),  # int
+            **int_fields('write', keys.get('write', zero)),  # int
+        }]
 
-    data = data['data']['data']
-    ops_disk = []
+    raise_incomplete(errors, state)
+    return state
 
-    for obj in data.get('data', []):
-        ops_disk.append({
-            'name': obj['key'],  # str
-            'ops': int(obj['value']),  # int
-        })
+
+async def get_io_analytics(asset: Asset, config: dict, token: str):
+    datasets, errors = await gather_named(asset, {
+        dataset: get_analytics(asset, config, token, dataset)
+        for dataset in DATASETS})
+    state = {}
+
+    # I/O operations per second broken down by disk
+    if 'io.ops[disk]' in datasets:
+        data = datasets['io.ops[disk]']['data']['data']
+        ops_disk = []
+
+        for obj in data.get('data', []):
+            ops_disk.append({
+                'name': obj['key'],  # str
+                'ops': int(obj['value']),  # int
+            })
+        state['ops_disk'] = limit_disks(ops_disk, config)
 
     # I/O operations per second broken down by type of operation
-    dataset = 'io.ops[op]'
-    data = await get_analytics(asset, config, token, dataset)
+    if 'io.ops[op]' in datasets:
+        data = datasets['io.ops[op]']['data']['data']
+        read, write = 0, 0
 
-    data = data['data']['data']
-    read, write = 0, 0
+        for obj in data.get('data', []):
+            if obj['key'] == 'read':
+                read = int(obj['value'])  # ensure int
+            elif obj['key'] == 'write':
+                write = int(obj['value'])  # ensure int
+            else:
+                # log other than read/write operation
+                logging.debug(obj['key'])
 
-    for obj in data.get('data', []):
-        if obj['key'] == 'read':
-            read = int(obj['value'])  # ensure int
-        elif obj['key'] == 'write':
-            write = int(obj['value'])  # ensure int
-        else:
-            # log other than read/write operation
-            logging.debug(obj['key'])
-
-    ops_op = [{
-        'name': 'io.ops[op]',
-        'read': read,  # int
-        'write': write,  # int
-    }]
-
-    state = {
-        'ops_op': ops_op,
-        'ops_disk': ops_disk,
-    }
+        state['ops_op'] = [{
+            'name': 'io.ops[op]',
+            'read': read,  # int
+            'write': write,  # int
+        }]
+
+    raise_incomplete(errors, state)
     return state
 
 
@@ -55,5 +98,8 @@ class CheckIo(Check):
     async def run(asset: Asset, local_config: dict, config: dict) -> dict:
 
         token = await get_token(asset, local_config, config)
-        state = await get_io_analytics(asset, config, token)
+        if config.get('per_second'):
+            state = await get_io_samples(asset, config, token)
+        else:
+            state = await get_io_analytics(asset, config, token)
         return state
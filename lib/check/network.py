@@ -1,114 +1,68 @@
-import logging
-import aiohttp
 from libprobe.asset import Asset
 from libprobe.check import Check
-from ..utils import get_token, DEF_API_VERSION, DEF_SECURE, DEF_PORT
-from ..connector import get_connector
+from ..fields import Field, Schema
+from ..utils import get_token, get_many, raise_incomplete
+
+
+# Network state is re-validated on each run when the appliance supports this;
+# Set `state_cache_ttl` in the asset config to re-use it for some seconds
+DEF_CACHE_TTL = 0
+
+ROUTES = Schema(
+    Field('name', 'href'),  # str
+    Field('destination', 'destination'),  # str
+    Field('family', 'family'),  # str
+    Field('gateway', 'gateway'),  # str
+    Field('interface', 'interface'),  # str
+    Field('mask', 'mask', None, True),  # int?
+    Field('status', 'status', None, True),  # str?
+    Field('type', 'type'),  # str
+)
+
+DEVICES = Schema(
+    Field('name', 'device'),  # str
+    Field('active', 'active'),  # bool
+    Field('duplex', 'duplex'),  # str
+    Field('factory_mac', 'factory_mac'),  # str
+    Field('media', 'media'),  # str
+    Field('speed', 'speed'),  # str (example: 1000 Mbit/s)
+    Field('up', 'up'),  # bool
+)
+
+INTERFACES = Schema(
+    Field('name', 'interface'),  # str
+    Field('admin', 'admin'),  # bool
+    Field('class', 'class'),  # str
+    Field('curaddrs', 'curaddrs'),  # list str
+    Field('enable', 'enable'),  # bool
+    Field('label', 'label'),  # str
+    Field('links', 'links'),  # list str
+    Field('state', 'state'),  # str (example: up)
+    Field('v4addrs', 'v4addrs'),  # list str
+    Field('v4dhcp', 'v4dhcp'),  # bool
+    Field('v6addrs', 'v6addrs'),  # list str
+    Field('v6dhcp', 'v6dhcp'),  # bool
+)
 
 
 async def get_network(asset: Asset, config: dict, token: str):
     state = {}
-    address = config.get('address')
-    if not address:
-        address = asset.name
-    headers = {'X-Auth-Session': token}
-    api_version = config.get('version', DEF_API_VERSION)
-    secure = config.get('secure', DEF_SECURE)
-    port = config.get('port', DEF_PORT)
-
-    protocol = 'https' if secure else 'http'
-
-    ##############################
-    # Routes
-    ##############################
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/network/{api_version}/routes'
-    )
-    logging.info(f'GET {url}')
-
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
-
-    routes = []
-    for route in data['routes']:
-        routes.append({
-            'name': route['href'],  # str
-            'destination': route['destination'],  # str
-            'family': route['family'],  # str
-            'gateway': route['gateway'],  # str
-            'interface': route['interface'],  # str
-            'mask': route.get('mask'),  # int?
-            'status': route.get('status'),  # str?
-            'type': route['type'],  # str
-        })
-
-    ##############################
-    # Devices
-    ##############################
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/network/{api_version}/devices'
-    )
-    logging.info(f'GET {url}')
-
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
-
-    devices = []
-    for device in data['devices']:
-        devices.append({
-            'name': device['device'],  # str
-            'active': device['active'],  # bool
-            'duplex': device['duplex'],  # str
-            'factory_mac': device['factory_mac'],  # str
-            'media': device['media'],  # str
-            'speed': device['speed'],  # str (example: 1000 Mbit/s)
-            'up': device['up'],  # bool
-        })
-
-    ##############################
-    # Interfaces
-    ##############################
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/network/{api_version}/interfaces'
-    )
-    logging.info(f'GET {url}')
-
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
-
-    interfaces = []
-    for iface in data['interfaces']:
-        interfaces.append({
-            'name': iface['interface'],  # str
-            'admin': iface['admin'],  # bool
-            'class': iface['class'],  # str
-            'curaddrs': iface['curaddrs'],  # list str
-            'enable': iface['enable'],  # bool
-            'label': iface['label'],  # str
-            'links': iface['links'],  # list str
-            'state': iface['state'],  # str (example: up)
-            'v4addrs': iface['v4addrs'],  # list str
-            'v4dhcp': iface['v4dhcp'],  # bool
-            'v6addrs': iface['v6addrs'],  # list str
-            'v6dhcp': iface['v6dhcp'],  # bool
-        })
-
-    state['devices'] = devices
-    state['interfaces'] = interfaces
-    state['routes'] = routes
-
+    cache_ttl = config.get('state_cache_ttl', DEF_CACHE_TTL)
+    data, errors = await get_many(asset, config, token, {
+        'routes': ('network', 'routes'),
+        'devices': ('network', 'devices'),
+        'interfaces': ('network', 'interfaces'),
+    }, cache_ttl)
+
+    if 'routes' in data:
+        state['routes'] = ROUTES.convert(data['routes']['routes'])
+    if 'devices' in data:
+        state['devices'] = DEVICES.convert(data['devices']['devices'])
+    if 'interfaces' in data:
+        state['interfaces'] = \
+            INTERFACES.convert(data['interfaces']['interfaces'])
+
+    raise_incomplete(errors, state)
     return state
 
 
@@ -0,0 +1,143 @@
+import asyncio
+import heapq
+import logging
+from urllib.parse import quote
+from libprobe.asset import Asset
+from libprobe.check import Check
+from ..cluster import Topology, get_topology
+from ..fields import Field, Schema
+from ..utils import get_token, get_data, iter_data, raise_incomplete
+
+
+# Maximum number of project and filesystem listings requested at once
+MAX_CRAWL = 8
+
+# Only the filesystems using most space are returned to keep the result small
+# on appliances with many shares; Change with `max_filesystems`
+DEF_MAX_FILESYSTEMS = 2000
+
+POOLS = Schema(
+    Field('name', 'name'),  # str
+    Field('status', 'status', None, True),  # str?
+    Field('profile', 'profile', None, True),  # str?
+    Field('available', 'usage.available', int, True),  # int?
+    Field('used', 'usage.used', int, True),  # int?
+    Field('total', 'usage.total', int, True),  # int?
+)
+
+PROJECTS = Schema(
+    Field('name', 'name'),  # str
+    Field('available', 'space_available', int, True),  # int?
+    Field('used', 'space_data', int, True),  # int?
+    Field('total', 'space_total', int, True),  # int?
+    Field('quota', 'quota', int, True),  # int?
+    Field('reservation', 'reservation', int, True),  # int?
+    Field('compressratio', 'compressratio', float, True),  # float?
+)
+
+FILESYSTEMS = Schema(
+    Field('name', 'name'),  # str
+    Field('available', 'space_available', int, True),  # int?
+    Field('used', 'space_data', int, True),  # int?
+    Field('total', 'space_total', int, True),  # int?
+    Field('quota', 'quota', int, True),  # int?
+    Field('compressratio', 'compressratio', float, True),  # float?
+)
+
+
+def _used(item: dict) -> int:
+    return item['used'] or 0
+
+
+async def get_pools(asset: Asset, config: dict, token: str,
+                    topology: Topology):
+    max_filesystems = config.get('max_filesystems', DEF_MAX_FILESYSTEMS)
+    crawl = asyncio.Semaphore(MAX_CRAWL)
+    errors: dict[str, str] = {}
+
+    async def crawl_all(names: list[str], coros: list) -> list:
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        for name, res in zip(names, results):
+            if isinstance(res, BaseException):
+                if isinstance(res, asyncio.CancelledError):
+                    raise res
+                errors[name] = str(res) or type(res).__name__
+                logging.debug(f'failed to get {name}: {errors[name]}; {asset}')
+        return [res for res in results if not isinstance(res, BaseException)]
+
+    async def get_projects(pool: str) -> list[tuple[str, dict]]:
+        async with crawl:
+            data = await get_data(
+                asset, config, token, 'storage',
+                f'pools/{quote(pool, safe="")}/projects')
+        return [(pool, project) for project in data['projects']]
+
+    async def get_filesystems(pool: str, project: str) -> list[dict]:
+        path = f'pools/{quote(pool, safe="")}' \
+            f'/projects/{quote(project, safe="")}/filesystems'
+        filesystems = []
+        async with crawl:
+            async for fs in iter_data(
+                    asset, config, token, 'storage', path, 'filesystems'):
+                item = FILESYSTEMS.convert_one(fs)
+                item['name'] = f'{pool}/{project}/{item["name"]}'
+                filesystems.append(item)
+        return filesystems
+
+    data = await get_data(asset, config, token, 'storage', 'pools')
+    # pools imported by the cluster peer are reported by the peer
+    pools = POOLS.convert(
+        [pool for pool in data['pools'] if topology.owns(pool['name'])])
+
+    names = [item['name'] for item in pools]
+    projects = [
+        (pool, project)
+        for res in await crawl_all(
+            [f'projects {pool}' for pool in names],
+            [get_projects(pool) for pool in names])
+        for pool, project in res]
+
+    names = [f'{pool}/{project["name"]}' for pool, project in projects]
+    results = await crawl_all(
+        [f'filesystems {name}' for name in names],
+        [get_filesystems(pool, project['name'])
+         for pool, project in projects])
+
+    counts = {}
+    for res in results:
+        for item in res:
+            name = item['name'].rsplit('/', 1)[0]
+            counts[name] = counts.get(name, 0) + 1
+
+    project_items = []
+    for name, (_, project) in zip(names, projects):
+        item = PROJECTS.convert_one(project)
+        item['name'] = name
+        item['filesystems'] = counts.get(name, 0) \
+            if f'filesystems {name}' not in errors else None  # int?
+        project_items.append(item)
+
+    filesystems = [item for res in results for item in res]
+    if len(filesystems) > max_filesystems:
+        filesystems = heapq.nlargest(max_filesystems, filesystems, key=_used)
+
+    state = {
+        'pools': pools,
+        'projects': project_items,
+        'filesystems': filesystems,
+    }
+    raise_incomplete(errors, state)
+    return state
+
+
+class CheckPools(Check):
+    key = 'pools'
+    unchanged_eol = 14400
+
+    @staticmethod
+    async def run(asset: Asset, local_config: dict, config: dict) -> dict:
+
+        token = await get_token(asset, local_config, config)
+        topology = await get_topology(asset, config, token)
+        state = await get_pools(asset, config, token, topology)
+        return state
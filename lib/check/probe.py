@@ -0,0 +1,49 @@
+from libprobe.asset import Asset
+from libprobe.check import Check
+from ..cache import response_cache
+from ..fingerprint import pop_suppressed
+from ..limiter import find_limiter
+from ..metrics import endpoint_item, pop_asset
+
+
+def get_unchanged(asset_id: int) -> list[dict]:
+    suppressed, suppressed_bytes = pop_suppressed(asset_id)
+    return [{
+        'name': 'unchanged',  # str
+        'suppressed': suppressed,  # int
+        'suppressed_bytes': suppressed_bytes,  # int
+    }]
+
+
+class CheckProbe(Check):
+    """Self-monitoring; Returns the request statistics per endpoint for the
+    asset since the previous run of this check. This check does not make
+    any request to the appliance."""
+    key = 'probe'
+    unchanged_eol = 0
+
+    @staticmethod
+    async def run(asset: Asset, local_config: dict, config: dict) -> dict:
+        endpoints = [
+            endpoint_item(endpoint, stats)
+            for endpoint, stats in sorted(pop_asset(asset.id).items())]
+        cache = [{
+            'name': 'response',  # str
+            **response_cache.stats(),  # int
+        }]
+        # imported here as lib.shard imports this module at start-up and
+        # the resolver imports aiohttp
+        from ..resolver import find_resolver
+        resolver = find_resolver()
+        if resolver is not None:
+            cache.append({
+                'name': 'resolver',  # str
+                **resolver.stats(),  # int
+            })
+        limiter = find_limiter(asset.id)
+        return {
+            'endpoints': endpoints,
+            'cache': cache,
+            'limiter': [] if limiter is None else [limiter.item()],
+            'unchanged': get_unchanged(asset.id),
+        }
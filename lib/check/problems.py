@@ -1,57 +1,28 @@
-import logging
-import aiohttp
-from dateutil import parser
 from libprobe.asset import Asset
 from libprobe.check import Check
-from ..utils import get_token, DEF_API_VERSION, DEF_SECURE, DEF_PORT
-from ..connector import get_connector
+from ..fields import Field, Schema, try_timestamp
+from ..utils import get_token, get_data
 
 
-async def get_problems(asset: Asset, config: dict, token: str):
-    address = config.get('address')
-    if not address:
-        address = asset.name
-    headers = {'X-Auth-Session': token}
-    api_version = config.get('version', DEF_API_VERSION)
-    secure = config.get('secure', DEF_SECURE)
-    port = config.get('port', DEF_PORT)
-
-    protocol = 'https' if secure else 'http'
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/problem/{api_version}/problems'
-    )
-
-    logging.info(f'GET {url}')
+PROBLEMS = Schema(
+    Field('name', 'uuid'),  # str
+    Field('code', 'code'),  # str
+    Field('description', 'description'),  # str
+    Field('severity', 'severity'),  # str
+    Field('type', 'type'),  # str
+    Field('impact', 'impact', None, True),  # str?
+    Field('action', 'action', None, True),  # str?
+    Field('response', 'response', None, True),  # str?
+    Field('repairable', 'repairable', None, True),  # bool?
+    Field('timestamp', ('diagnosed', 'timestamp'),
+          try_timestamp, True),  # int?
+)
 
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
 
-    problems = []
-    for problem in data['problems']:
-        try:
-            timestr = problem.get('diagnosed', problem.get('timestamp'))
-            timestamp = int(parser.parse(timestr).timestamp())
-        except Exception:
-            timestamp = None
-
-        problems.append({
-            'name': problem['uuid'],  # str
-            'code': problem['code'],  # str
-            'description': problem['description'],  # str
-            'severity': problem['severity'],  # str
-            'type': problem['type'],  # str
-            'impact': problem.get('impact'),  # str?
-            'action': problem.get('action'),  # str?
-            'response': problem.get('response'),  # str?
-            'repairable': problem.get('repairable'),  # bool?
-            'timestamp': timestamp,  # int?
-        })
+async def get_problems(asset: Asset, config: dict, token: str):
+    data = await get_data(asset, config, token, 'problem', 'problems')
 
-    state = {'problems': problems}
+    state = {'problems': PROBLEMS.convert(data['problems'])}
     return state
 
 
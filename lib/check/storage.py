@@ -1,54 +1,37 @@
-import logging
-import aiohttp
 from libprobe.asset import Asset
 from libprobe.check import Check
-from ..utils import (
-    get_token, as_int, as_float, DEF_API_VERSION, DEF_SECURE, DEF_PORT)
-from ..connector import get_connector
-
-
-async def get_luns(asset: Asset, config: dict, token: str):
-    address = config.get('address')
-    if not address:
-        address = asset.name
-    headers = {'X-Auth-Session': token}
-    api_version = config.get('version', DEF_API_VERSION)
-    secure = config.get('secure', DEF_SECURE)
-    port = config.get('port', DEF_PORT)
-
-    protocol = 'https' if secure else 'http'
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/storage/{api_version}/luns'
-    )
-
-    logging.info(f'GET {url}')
-
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
-
+from ..cluster import Topology, get_topology
+from ..fields import Field, Schema
+from ..utils import get_token, iter_data
+
+
+LUNS = Schema(
+    Field('name', 'canonical_name'),  # str
+    Field('sparse', 'sparse'),  # bool
+    Field('volsize', 'volsize', int),  # int
+    Field('volblocksize', 'volblocksize', int),  # int
+    Field('usage_available', 'usage.available', int, True),  # int?
+    Field('usage_total', 'usage.total', int, True),  # int?
+    Field('usage_data', 'usage.data', int, True),  # int?
+    Field('usage_compressratio', 'usage.compressratio', float, True),  # float?
+    Field('usage_snapshots', 'usage.snapshots', float, True),  # float?
+    Field('usage_loading', 'usage.loading', None, True),  # bool?
+    Field('status', 'status', None, True),  # str
+    Field('stmfguid', ('stmfguid', 'lunguid'), None, True),  # str
+)
+
+
+async def get_luns(asset: Asset, config: dict, token: str,
+                   topology: Topology):
     luns = []
-    for lun in data['luns']:
-        usage = lun.get('usage', {})
-        stmfguid = lun.get('stmfguid', lun.get('lunguid'))
+    if topology.pools is not None and not topology.pools:
+        # all pools are imported by the cluster peer
+        return {'luns': luns}
 
-        luns.append({
-            'name': lun['canonical_name'],  # str
-            'sparse': lun['sparse'],  # bool
-            'volsize': int(lun['volsize']),  # int
-            'volblocksize': int(lun['volblocksize']),  # int
-            'usage_available': as_int(usage, 'available'),  # int?
-            'usage_total': as_int(usage, 'total'),  # int?
-            'usage_data': as_int(usage, 'data'),  # int?
-            'usage_compressratio': as_float(usage, 'compressratio'),  # float?
-            'usage_snapshots': as_float(usage, 'snapshots'),  # float?
-            'usage_loading': usage.get('loading'),  # bool?
-            'status': lun.get('status'),  # str
-            'stmfguid': stmfguid,  # str
-        })
+    async for lun in iter_data(
+            asset, config, token, 'storage', 'luns', 'luns'):
+        if topology.owns(lun.get('pool')):
+            luns.append(LUNS.convert_one(lun))
 
     state = {'luns': luns}
     return state
@@ -62,5 +45,6 @@ class CheckStorage(Check):
     async def run(asset: Asset, local_config: dict, config: dict) -> dict:
 
         token = await get_token(asset, local_config, config)
-        state = await get_luns(asset, config, token)
+        topology = await get_topology(asset, config, token)
+        state = await get_luns(asset, config, token, topology)
         return state
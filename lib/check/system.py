@@ -1,64 +1,39 @@
-import logging
-import aiohttp
-import datetime
 from libprobe.asset import Asset
 from libprobe.check import Check
-from ..utils import get_token, DEF_API_VERSION, DEF_SECURE, DEF_PORT
-from ..connector import get_connector
-
-
-def dt(date_string: str | None) -> int | None:
-    return None if date_string is None else \
-        int(datetime.datetime.fromisoformat(date_string).timestamp())
+from ..fields import Field, Schema, to_timestamp
+from ..utils import get_token, get_system
+
+
+VERSION = Schema(
+    Field('nodename', 'nodename', None, True),  # str?
+    Field('mkt_product', 'mkt_product', None, True),  # str?
+    Field('product', 'product', None, True),  # str?
+    Field('version', 'version', None, True),  # str?
+    Field('install_time', 'install_time', to_timestamp, True),  # int?
+    Field('update_time', 'update_time', to_timestamp, True),  # int?
+    Field('boot_time', 'boot_time', to_timestamp, True),  # int?
+    Field('asn', 'asn', None, True),  # str?
+    Field('csn', 'csn', None, True),  # str?
+    Field('part', 'part', None, True),  # str?
+    Field('urn', 'urn', None, True),  # str?
+    Field('navname', 'navname', None, True),  # str?
+    Field('navagent', 'navagent', None, True),  # str?
+    Field('http', 'http', None, True),  # str?
+    Field('ssl', 'ssl', None, True),  # str?
+    Field('ak_version', 'ak_version', None, True),  # str?
+    Field('ak_release', 'ak_release', None, True),  # str?
+    Field('os_version', 'os_version', None, True),  # str?
+    Field('bios_version', 'bios_version', None, True),  # str?
+    Field('sp_version', 'sp_version', None, True),  # str?
+)
 
 
 async def get_version(asset: Asset, config: dict, token: str):
-    address = config.get('address')
-    if not address:
-        address = asset.name
-    headers = {'X-Auth-Session': token}
-    api_version = config.get('version', DEF_API_VERSION)
-    secure = config.get('secure', DEF_SECURE)
-    port = config.get('port', DEF_PORT)
-
-    protocol = 'https' if secure else 'http'
-
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/system/{api_version}/version'
-    )
-    logging.info(f'GET {url}')
-
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
-
-    version = data['version']
+    data = await get_system(asset, config, token, 'version')
 
     item = {
         'name': 'version_info',
-        'nodename': version.get('nodename'),  # str?
-        'mkt_product': version.get('mkt_product'),  # str?
-        'product': version.get('product'),  # str?
-        'version': version.get('version'),  # str?
-        'install_time': dt(version.get('install_time')),  # int?
-        'update_time': dt(version.get('update_time')),  # int?
-        'boot_time': dt(version.get('boot_time')),  # int?
-        'asn': version.get('asn'),  # str?
-        'csn': version.get('csn'),  # str?
-        'part': version.get('part'),  # str?
-        'urn': version.get('urn'),  # str?
-        'navname': version.get('navname'),  # str?
-        'navagent': version.get('navagent'),  # str?
-        'http': version.get('http'),  # str?
-        'ssl': version.get('ssl'),  # str?
-        'ak_version': version.get('ak_version'),  # str?
-        'ak_release': version.get('ak_release'),  # str?
-        'os_version': version.get('os_version'),  # str?
-        'bios_version': version.get('bios_version'),  # str?
-        'sp_version': version.get('sp_version'),  # str?
+        **VERSION.convert_one(data['version']),
     }
 
     return {'version': [item]}
@@ -0,0 +1,81 @@
+import logging
+from typing import NamedTuple
+from libprobe.asset import Asset
+from .utils import get_data, gather_named
+
+# The cluster topology is taken from cached responses; Ownership changes on
+# a takeover or failback are seen after at most this amount of seconds
+DEF_CLUSTER_TTL = 300
+
+
+class Topology(NamedTuple):
+    nodename: str | None = None
+    # Pools owned by this head; None when not clustered (all pools)
+    pools: frozenset[str] | None = None
+    # Reports shared resources which are not part of a pool, like the disk
+    # shelves; Both heads report these, so only one of the heads is primary
+    primary: bool = True
+
+    def owns(self, pool: str | None) -> bool:
+        return self.pools is None or pool is None or pool in self.pools
+
+
+NOT_CLUSTERED = Topology()
+
+
+def _topology(cluster: dict, nodename: str) -> Topology:
+    state = cluster.get('state')
+    if not state or state == 'AKCS_UNCONFIGURED':
+        return Topology(nodename)
+
+    peer_state = cluster.get('peer_state')
+    if state != 'AKCS_CLUSTERED' or peer_state != 'AKCS_CLUSTERED':
+        # on a takeover or when the peer is unreachable it is not known which
+        # head the other collector sees, so both heads report everything
+        logging.debug(
+            f'cluster state {state}, peer {peer_state}; report all resources')
+        return Topology(nodename)
+
+    resources = [
+        resource for resource in cluster.get('resources', ())
+        if '/resources/zfs/' in resource.get('href', '')]
+    if not resources or not all(r.get('owner') for r in resources):
+        logging.debug('unknown pool ownership; report all resources')
+        return Topology(nodename)
+
+    pools = frozenset(
+        resource['href'].rsplit('/', 1)[1]
+        for resource in resources if resource['owner'] == nodename)
+
+    peer = cluster.get('peer_hostname')
+    primary = not peer or nodename < peer
+    return Topology(nodename, pools, primary)
+
+
+async def get_topology(asset: Asset, config: dict, token: str) -> Topology:
+    """Returns the cluster topology for the asset head.
+
+    Shared resources are only collected by the owning head when the asset
+    config has `cluster_aware` enabled (default). When the topology cannot
+    be determined (the cluster API fails, a takeover or an unreachable
+    peer), the head is handled as not clustered so both heads report all
+    pools, LUNs and shelves.
+    """
+    if not config.get('cluster_aware', True):
+        return NOT_CLUSTERED
+
+    ttl = config.get('cluster_ttl', DEF_CLUSTER_TTL)
+    data, errors = await gather_named(asset, {
+        'cluster': get_data(asset, config, token, 'hardware', 'cluster', ttl),
+        'version': get_data(asset, config, token, 'system', 'version', ttl),
+    })
+    if errors:
+        msg = ', '.join(f'{name} ({err})' for name, err in errors.items())
+        logging.debug(f'no cluster topology: {msg}; {asset}')
+        return NOT_CLUSTERED
+
+    nodename = data['version']['version'].get('nodename')
+    if not nodename:
+        return NOT_CLUSTERED
+
+    return _topology(data['cluster']['cluster'], nodename)
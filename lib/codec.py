@@ -0,0 +1,47 @@
+"""JSON decoding of response bodies; orjson is used when installed as it
+decodes large bodies (alerts, LUNs) several times faster than the stdlib.
+
+Select the codec with the JSON_CODEC environment variable (`auto`, `json` or
+`orjson`); With `auto` (default) orjson is used when installed.
+"""
+import json
+import logging
+import os
+from typing import Any, Callable
+
+JSON_CODEC = os.getenv('JSON_CODEC', 'auto')
+
+
+def _stdlib_loads(body: bytes) -> Any:
+    return json.loads(body)
+
+
+def _get_orjson_loads() -> Callable[[bytes], Any] | None:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    def orjson_loads(body: bytes) -> Any:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # for example NaN, which is accepted by the stdlib decoder
+            return json.loads(body)
+
+    return orjson_loads
+
+
+def _select(name: str) -> tuple[str, Callable[[bytes], Any]]:
+    if name in ('auto', 'orjson'):
+        func = _get_orjson_loads()
+        if func is not None:
+            return 'orjson', func
+        if name == 'orjson':
+            logging.warning('JSON_CODEC orjson is not installed')
+    elif name != 'json':
+        logging.warning(f'unknown JSON_CODEC: {name}')
+    return 'json', _stdlib_loads
+
+
+codec_name, loads = _select(JSON_CODEC)
@@ -1,5 +1,23 @@
 import aiohttp
 import asyncio
+import logging
+import time
+from types import SimpleNamespace
+from typing import cast
+from . import archive, metrics
+from .resolver import get_resolver
+
+# Keep-alive connections are re-used by subsequent check runs; The appliance
+# may close a connection earlier, aiohttp then transparently retries a GET on
+# a fresh connection.
+KEEPALIVE_TIMEOUT = 300.0
+
+# Sessions which are not used for this amount of seconds are closed; This
+# happens for example when an asset is removed or the address is changed.
+SESSION_IDLE_TIMEOUT = 900.0
+
+# Session registry; One session (and connection pool) per address and port
+_sessions: dict[tuple[str, int], tuple[float, aiohttp.ClientSession]] = {}
 
 
 def get_connector(
@@ -8,10 +26,137 @@ def get_connector(
     if loop is None:
         loop = asyncio.get_running_loop()
 
+    # The resolver caches addresses for all connectors; The aiohttp DNS cache
+    # is per connector (and therefore per session)
     return aiohttp.TCPConnector(
         limit=100,  # 100 is default
         use_dns_cache=False,
+        resolver=get_resolver(),
         enable_cleanup_closed=True,
-        force_close=True,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
         loop=loop,
     )
+
+
+async def _on_request_start(session: aiohttp.ClientSession,
+                            ctx: SimpleNamespace,
+                            params: aiohttp.TraceRequestStartParams):
+    ctx.start = ctx.phase = time.perf_counter()
+    ctx.reused = False
+
+
+async def _on_phase_start(session: aiohttp.ClientSession,
+                          ctx: SimpleNamespace, params: object):
+    ctx.phase = time.perf_counter()
+
+
+def _on_phase_end(phase: str):
+    async def on_phase_end(session: aiohttp.ClientSession,
+                           ctx: SimpleNamespace, params: object):
+        if ctx.trace_request_ctx is not None:
+            metrics.add_timing(
+                ctx.trace_request_ctx['asset_id'],
+                ctx.trace_request_ctx['endpoint'],
+                phase, time.perf_counter() - ctx.phase)
+    return on_phase_end
+
+
+async def _on_connection_reused(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceConnectionReuseconnParams):
+    ctx.reused = True
+
+
+async def _on_request_end(session: aiohttp.ClientSession,
+                          ctx: SimpleNamespace,
+                          params: aiohttp.TraceRequestEndParams):
+    if ctx.trace_request_ctx is not None:
+        asset_id = ctx.trace_request_ctx['asset_id']
+        endpoint = ctx.trace_request_ctx['endpoint']
+        metrics.add_timing(
+            asset_id, endpoint, 'ttfb', time.perf_counter() - ctx.start)
+        metrics.add_request(
+            asset_id, endpoint, params.response.status, ctx.reused)
+
+
+async def _on_request_exception(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestExceptionParams):
+    if isinstance(params.exception, aiohttp.ClientConnectorError) and \
+            not isinstance(params.exception, aiohttp.ClientConnectorDNSError):
+        # the address might have changed
+        get_resolver().invalidate(params.url.host or '')
+    if ctx.trace_request_ctx is not None:
+        metrics.add_request(
+            ctx.trace_request_ctx['asset_id'],
+            ctx.trace_request_ctx['endpoint'], None, ctx.reused)
+
+
+def get_trace_config() -> aiohttp.TraceConfig:
+    """Returns a trace configuration which records request timings in
+    lib.metrics; Requests must pass a mapping with `asset_id` and `endpoint`
+    as `trace_request_ctx` to be recorded."""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_dns_resolvehost_start.append(_on_phase_start)
+    trace_config.on_dns_resolvehost_end.append(_on_phase_end('dns'))
+    trace_config.on_connection_create_start.append(_on_phase_start)
+    trace_config.on_connection_create_end.append(_on_phase_end('connect'))
+    trace_config.on_connection_reuseconn.append(_on_connection_reused)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    return trace_config
+
+
+def _new_session() -> aiohttp.ClientSession:
+    metrics.start_summary()
+    if archive.REPLAY:
+        # no requests are made; The responses are served from the archive
+        return cast(aiohttp.ClientSession, archive.ReplaySession(
+            archive.REPLAY, archive.REPLAY_SPEED))
+
+    session = aiohttp.ClientSession(
+        connector=get_connector(),
+        trace_configs=[get_trace_config()])
+    if archive.RECORD:
+        return cast(aiohttp.ClientSession, archive.RecordingSession(session))
+    return session
+
+
+def _evict_idle(now: float):
+    for key, (ts, session) in tuple(_sessions.items()):
+        if ts + SESSION_IDLE_TIMEOUT < now:
+            del _sessions[key]
+            logging.debug(f'close idle session for {key[0]}:{key[1]}')
+            asyncio.ensure_future(session.close())
+
+
+def get_session(address: str, port: int) -> aiohttp.ClientSession:
+    """Returns a long-lived session for the given address and port.
+
+    The session must not be closed by the caller; Use close_sessions() on
+    shutdown instead.
+    """
+    now = time.time()
+    _evict_idle(now)
+
+    key = address, port
+    try:
+        _, session = _sessions[key]
+    except KeyError:
+        session = _new_session()
+    else:
+        if session.closed:
+            session = _new_session()
+
+    _sessions[key] = now, session
+    return session
+
+
+async def close_sessions():
+    sessions = [session for _, session in _sessions.values()]
+    _sessions.clear()
+    for session in sessions:
+        await session.close()
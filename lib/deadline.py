@@ -0,0 +1,70 @@
+"""Deadline of the running check; Requests made by the check use the time
+left as time-out so a hung request does not consume the check time-out and
+the collected part can still be returned."""
+import asyncio
+import os
+import random
+from contextvars import ContextVar
+
+# Default check interval in seconds, used when not given in the config
+DEF_INTERVAL = 300
+
+# Same as the libprobe check time-out: 80% of the interval with
+# MAX_CHECK_TIMEOUT as maximum
+MAX_CHECK_TIMEOUT = float(os.getenv('MAX_CHECK_TIMEOUT', 300))
+
+# Part of the check time-out for requests; The remainder is used to handle
+# the responses and to return a partial result before the check times out
+DEADLINE_FACTOR = 0.9
+
+# A first attempt leaves this part of the time left (with a maximum of
+# MAX_RETRY_RESERVE seconds) for a retry
+RETRY_SHARE = 0.25
+MAX_RETRY_RESERVE = 30.0
+
+# A retry waits RETRY_DELAY seconds plus a random jitter of up to the same
+# amount, and is only made with at least MIN_RETRY_TIMEOUT seconds left
+RETRY_DELAY = 0.5
+MIN_RETRY_TIMEOUT = 2.0
+
+_deadline: ContextVar[float | None] = ContextVar('deadline', default=None)
+
+
+def set_deadline(config: dict):
+    """Sets the deadline for the requests of the check in the current
+    context; Call this when the check starts."""
+    interval = config.get('_interval', DEF_INTERVAL)
+    timeout = min(0.8 * interval, MAX_CHECK_TIMEOUT) * DEADLINE_FACTOR
+    _deadline.set(asyncio.get_running_loop().time() + timeout)
+
+
+def remaining() -> float | None:
+    """Returns the seconds left or None when no deadline is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+
+def request_timeout(retry: bool = False) -> float | None:
+    """Returns the time-out in seconds for a request or None when no deadline
+    is set; A first attempt leaves time for a retry, a retry may use all the
+    time left."""
+    timeout = remaining()
+    if timeout is None:
+        return None
+    if timeout <= 0:
+        raise asyncio.TimeoutError('check deadline exceeded')
+    if not retry:
+        timeout -= min(timeout * RETRY_SHARE, MAX_RETRY_RESERVE)
+    return timeout
+
+
+def retry_delay() -> float | None:
+    """Returns the jittered delay before a retry or None when there is not
+    enough time left for a retry."""
+    delay = RETRY_DELAY * (1.0 + random.random())
+    timeout = remaining()
+    if timeout is None or timeout - delay < MIN_RETRY_TIMEOUT:
+        return None
+    return delay
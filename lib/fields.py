@@ -0,0 +1,135 @@
+import functools
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, NamedTuple
+
+# Matches both 2024-01-02T03:04:05Z and the 20240102T03:04:05 alert format
+_ISO_8601 = re.compile(
+    r'(\d{4})-?(\d\d)-?(\d\d)[T ](\d\d):?(\d\d):?(\d\d)(?:\.\d+)?'
+    r'(Z|[+-]\d\d:?\d\d)?$')
+
+
+@functools.lru_cache(maxsize=8192)
+def to_timestamp(value: str) -> int:
+    """Returns the UNIX timestamp for a date/time string.
+
+    ISO-8601 strings are parsed directly, other formats fall back to
+    dateutil. Like dateutil, a time without offset is taken as local time.
+    """
+    m = _ISO_8601.match(value)
+    if m is None:
+        from dateutil import parser
+        return int(parser.parse(value).timestamp())
+
+    year, month, day, hour, minute, second, offset = m.groups()
+    if offset is None:
+        tzinfo = None
+    elif offset == 'Z':
+        tzinfo = timezone.utc
+    else:
+        sign = -1 if offset[0] == '-' else 1
+        offset = offset[1:].replace(':', '')
+        tzinfo = timezone(sign * timedelta(
+            hours=int(offset[:2]), minutes=int(offset[2:])))
+
+    return int(datetime(
+        int(year), int(month), int(day),
+        int(hour), int(minute), int(second),
+        tzinfo=tzinfo).timestamp())
+
+
+def to_utc_timestamp(value: str) -> int:
+    """Like to_timestamp() but a time without offset is taken as UTC; The
+    appliance uses UTC for the alert time-stamps."""
+    m = _ISO_8601.match(value)
+    if m is not None and m.group(7) is None:
+        value += 'Z'
+    return to_timestamp(value)
+
+
+def try_timestamp(value: str) -> int | None:
+    """Like to_timestamp() but returns None if the value cannot be parsed."""
+    try:
+        return to_timestamp(value)
+    except Exception:
+        return None
+
+
+class Field(NamedTuple):
+    # Output key
+    name: str
+    # Source key, use dots for nested keys (for example `usage.total`); With
+    # multiple keys the first key which exists is used
+    source: str | tuple[str, ...]
+    # Conversion function, for example `int`; None to keep the value as is
+    type: Callable[[Any], Any] | None = None
+    # When optional, a missing key (or None value) results in None
+    optional: bool = False
+
+
+class Schema:
+    """Converts items from the API to check items.
+
+    The fields are compiled once to a single list comprehension so converting
+    a list does not look-up the field specifications for every item.
+    """
+
+    def __init__(self, *fields: Field):
+        self.fields = fields
+        namespace = self._compile(fields)
+        self.convert: Callable[[list[dict]], list[dict]] = \
+            namespace['convert']
+        self.convert_one: Callable[[dict], dict] = namespace['convert_one']
+
+    @staticmethod
+    def _compile(fields: tuple[Field, ...]) -> dict[str, Any]:
+        namespace: dict[str, Any] = {'_EMPTY': {}}
+        parents: dict[str, str] = {}  # nested path -> variable name
+        nested = []  # (variable, expression) for the nested dicts
+
+        def parent(path: list[str]) -> str:
+            obj = 'item'
+            for i, key in enumerate(path):
+                name = '.'.join(path[:i + 1])
+                var = parents.get(name)
+                if var is None:
+                    var = parents[name] = f'p{len(parents)}'
+                    nested.append((var, f'{obj}.get({key!r}, _EMPTY)'))
+                obj = var
+            return obj
+
+        values = []
+        for i, field in enumerate(fields):
+            sources = (field.source, ) \
+                if isinstance(field.source, str) else field.source
+
+            *path, key = sources[-1].split('.')
+            obj = parent(path)
+            expr = f'{obj}.get({key!r})' if field.optional \
+                else f'{obj}[{key!r}]'
+
+            for source in reversed(sources[:-1]):
+                *path, key = source.split('.')
+                obj = parent(path)
+                expr = f'({obj}[{key!r}] if {key!r} in {obj} else {expr})'
+
+            if field.type is not None:
+                namespace[f'c{i}'] = field.type
+                expr = f'None if (v := {expr}) is None else c{i}(v)' \
+                    if field.optional else f'c{i}({expr})'
+
+            values.append(f'{field.name!r}: {expr}')
+
+        result = f'{{{", ".join(values)}}}'
+        clauses = ''.join(f' for {var} in ({expr}, )' for var, expr in nested)
+        statements = ''.join(f'    {var} = {expr}\n' for var, expr in nested)
+        code = (
+            'def convert(items):\n'
+            f'    return [{result} for item in items{clauses}]\n'
+            '\n'
+            'def convert_one(item):\n'
+            f'{statements}'
+            f'    return {result}\n'
+        )
+        exec(code, namespace)
+        return namespace
@@ -0,0 +1,75 @@
+import hashlib
+import msgpack
+import time
+from collections import defaultdict
+from libprobe.check import Check
+from libprobe.probe import Probe
+from libprobe.utils import order
+
+
+def fingerprint(result: dict) -> tuple[bytes, int]:
+    """Returns a digest of a check result and the size of the packed result.
+
+    The items are packed and hashed one by one so the result is never packed
+    at once. The result must be ordered (libprobe.utils.order) to get the
+    same digest for the same items.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    packer = msgpack.Packer()
+    size = 0
+    for type_name in sorted(result):
+        items = result[type_name]
+        data = packer.pack((type_name, len(items)))
+        h.update(data)
+        size += len(data)
+        for item in items:
+            data = packer.pack(item)
+            h.update(data)
+            size += len(data)
+    return h.digest(), size
+
+
+# Suppressed results and bytes by asset Id since the last self-monitoring
+# check
+_suppressed: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+
+
+def pop_suppressed(asset_id: int) -> tuple[int, int]:
+    count, size = _suppressed.pop(asset_id, (0, 0))
+    return count, size
+
+
+class FingerprintProbe(Probe):
+    """Probe which keeps only a digest of the previous result of a check for
+    the unchanged_eol comparison instead of the complete result.
+
+    This overrides Probe._unchanged, which is not part of the public libprobe
+    API; It relies on the internals of libprobe==2.0.6 (see requirements.txt)
+    and tests/test_fingerprint.py fails when an upgrade changes the method.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fingerprints: dict[tuple, tuple[float, bytes]] = {}
+
+    def _unchanged(self, check: type[Check], path: tuple,
+                   result: dict | None, error: dict | None) -> bool:
+        if not check.unchanged_eol:
+            return False
+        if result is None or error is not None:
+            self._fingerprints.pop(path, None)
+            return False
+
+        order(result)
+        digest, size = fingerprint(result)
+
+        eol, prev = self._fingerprints.get(path, (0.0, None))
+        now = time.time()
+        if eol > now and prev == digest:
+            suppressed = _suppressed[path[0]]
+            suppressed[0] += 1
+            suppressed[1] += size
+            return True
+
+        self._fingerprints[path] = now + check.unchanged_eol, digest
+        return False
@@ -0,0 +1,183 @@
+import re
+from typing import Any, Callable
+from .codec import loads
+
+_WHITESPACE = b' \t\n\r'
+_OPEN = b'{['
+_QUOTE = ord('"')
+_MISSING = object()
+
+# Strings and anything but brackets; Stops at a bracket, an incomplete
+# string or the end of the data
+_PLAIN = re.compile(
+    rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_LITERAL = re.compile(rb'[^,:\]}\s]*')
+
+# Number of candidate ends tried for decoding the complete items at once
+BATCH_TRIES = 2
+
+# Parser states
+_START, _OBJECT, _COLON, _VALUE, _ITEMS, _DONE = range(6)
+
+
+class ItemStream:
+    """Incremental parser for the list items of a key in a JSON object.
+
+    For example ItemStream('luns') returns the items of {"luns": [...]} while
+    data is fed; only the current item and the unparsed remainder of the last
+    chunk are kept in memory. Other keys in the object are skipped.
+
+    The items are decoded with `loads`, by default the selected codec (see
+    lib/codec.py); The complete items in the data are decoded at once up to
+    the last `},` or `],`, other items are decoded one by one after scanning
+    for their end.
+    """
+
+    def __init__(self, key: str, loads: Callable[[bytes], Any] = loads):
+        self._key = key
+        self._loads = loads
+        self._current: str | None = None
+        self._state = _START
+        self._buf = b''
+        self._pos = 0
+        # scan state of the value at _pos, relative to _pos
+        self._scanned = 0
+        self._depth = 0
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return self._parse(False)
+
+    def close(self) -> list[Any]:
+        items = self._parse(True)
+        if self._state != _DONE and self._state != _START:
+            raise ValueError('unexpected end of JSON data')
+        return items
+
+    def _skip_whitespace(self) -> bool:
+        buf, pos, n = self._buf, self._pos, len(self._buf)
+        while pos < n and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return pos < n
+
+    def _scan(self, eof: bool) -> int:
+        """Returns the end of the value at the current position or -1 when
+        more data is required; The scan of an object or array continues
+        where the previous one stopped."""
+        buf, n = self._buf, len(self._buf)
+        if buf[self._pos] == _QUOTE:
+            m = _STRING.match(buf, self._pos)
+            return m.end() if m else n if eof else -1
+        if buf[self._pos] not in _OPEN:
+            end = _LITERAL.match(buf, self._pos).end()  # type: ignore
+            return end if end < n or eof else -1
+
+        pos, depth = self._pos + self._scanned, self._depth
+        while True:
+            pos = _PLAIN.match(buf, pos).end()  # type: ignore
+            if pos == n or buf[pos] == _QUOTE:
+                if eof:
+                    return n
+                self._scanned, self._depth = pos - self._pos, depth
+                return -1
+            depth += 1 if buf[pos] in _OPEN else -1
+            pos += 1
+            if depth == 0:
+                self._scanned = self._depth = 0
+                return pos
+
+    def _decode_batch(self) -> list[Any]:
+        buf, pos = self._buf, self._pos
+        end = len(buf)
+        for _ in range(BATCH_TRIES):
+            end = max(buf.rfind(b'},', pos, end), buf.rfind(b'],', pos, end))
+            if end == -1:
+                break
+            try:
+                items = self._loads(b'[' + buf[pos:end + 1] + b']')
+            except ValueError:
+                # the candidate is not the end of an item, for example the
+                # end of an object in the last (incomplete) item
+                continue
+            self._pos = end + 1
+            self._scanned = self._depth = 0
+            return items
+        return []
+
+    def _decode(self, eof: bool) -> Any:
+        end = self._scan(eof)
+        if end == -1:
+            return _MISSING
+        value = self._loads(self._buf[self._pos:end])
+        self._pos = end
+        return value
+
+    def _parse(self, eof: bool) -> list[Any]:
+        items = []
+        while self._state != _DONE and self._skip_whitespace():
+            c = self._buf[self._pos:self._pos + 1]
+
+            if self._state == _ITEMS:
+                if c == b']':
+                    self._state = _DONE
+                elif c == b',':
+                    self._pos += 1
+                elif batch := self._decode_batch():
+                    items.extend(batch)
+                else:
+                    item = self._decode(eof)
+                    if item is _MISSING:
+                        break
+                    items.append(item)
+
+            elif self._state == _START:
+                if c == b'{':
+                    self._pos += 1
+                    self._state = _OBJECT
+                else:
+                    # not an object (for example null); no items
+                    if self._decode(eof) is _MISSING:
+                        break
+                    self._state = _DONE
+
+            elif self._state == _OBJECT:
+                if c == b'}':
+                    self._state = _DONE
+                elif c == b',':
+                    self._pos += 1
+                else:
+                    m = _STRING.match(self._buf, self._pos)
+                    if m is None:
+                        if eof or c != b'"':
+                            raise ValueError(
+                                f'expecting a key at position {self._pos}')
+                        break
+                    self._current = self._loads(m.group())
+                    self._pos = m.end()
+                    self._state = _COLON
+
+            elif self._state == _COLON:
+                if c != b':':
+                    raise ValueError(f'expecting `:` at position {self._pos}')
+                self._pos += 1
+                self._state = _VALUE
+
+            elif self._current == self._key and c == b'[':
+                self._pos += 1
+                self._state = _ITEMS
+
+            else:
+                # skip the value of another key
+                end = self._scan(eof)
+                if end == -1:
+                    break
+                self._pos = end
+                self._state = \
+                    _DONE if self._current == self._key else _OBJECT
+
+        if self._state == _DONE:
+            self._buf, self._pos = b'', 0
+        return items
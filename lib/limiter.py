@@ -0,0 +1,173 @@
+import asyncio
+import time
+from collections import deque
+from libprobe.asset import Asset
+
+# Concurrency limits per asset; The floor and ceiling can be changed with
+# `min_requests` and `max_requests` in the asset config
+DEF_FLOOR = 1
+DEF_CEILING = 8
+INITIAL_LIMIT = 4
+
+# The limit is decreased (multiplied) on errors or when the time to response
+# exceeds LATENCY_FACTOR times the base latency, but never for latencies
+# below MIN_LATENCY seconds
+DECREASE_FACTOR = 0.7
+LATENCY_FACTOR = 3.0
+MIN_LATENCY = 0.05
+
+# The base latency follows a lower latency at once and a higher latency
+# slowly so it adapts when the appliance is permanently slower
+BASE_ALPHA = 0.01
+
+
+class Limiter:
+    """Limits the simultaneous requests to an asset (AIMD).
+
+    The limit is increased by one for each `limit` successful requests and
+    decreased by DECREASE_FACTOR on an error or a slow response; Only one
+    decrease is done for requests which were running at the same time.
+    """
+
+    def __init__(self, floor: int, ceiling: int):
+        self.limit = float(INITIAL_LIMIT)
+        self.active = 0
+        self.decreases = 0
+        self._base: float | None = None
+        self._decreased = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.set_bounds(floor, ceiling)
+
+    def set_bounds(self, floor: int, ceiling: int):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = min(max(self.limit, self.floor), self.ceiling)
+        self._wake()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _wake(self):
+        while self._waiters and self.active < int(self.limit):
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.active += 1
+                fut.set_result(None)
+
+    async def acquire(self) -> float:
+        """Waits for a free slot and returns the start time; This start time
+        must be passed to release()."""
+        if self.active < int(self.limit) and not self._waiters:
+            self.active += 1
+            return time.perf_counter()
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # slot was given while cancelled
+            else:
+                self._waiters.remove(fut)
+            raise
+        return time.perf_counter()
+
+    def release(self, start: float | None = None,
+                latency: float | None = None, ok: bool = True):
+        """Frees a slot; Without start time the limit is not adjusted, for
+        example when a request is cancelled."""
+        self.active -= 1
+        if start is not None:
+            self._adjust(start, latency, ok)
+        self._wake()
+
+    def _adjust(self, start: float, latency: float | None, ok: bool):
+        if ok and latency is not None:
+            if self._base is None or latency < self._base:
+                self._base = latency
+            else:
+                self._base += (latency - self._base) * BASE_ALPHA
+            if latency < MIN_LATENCY or \
+                    latency < self._base * LATENCY_FACTOR:
+                if self.limit < self.ceiling:
+                    self.limit = min(
+                        self.ceiling, self.limit + 1.0 / self.limit)
+                return
+
+        if start >= self._decreased:
+            self.limit = max(self.floor, self.limit * DECREASE_FACTOR)
+            self._decreased = time.perf_counter()
+            self.decreases += 1
+
+    def slot(self) -> 'Slot':
+        return Slot(self)
+
+    def item(self) -> dict:
+        return {
+            'name': 'requests',  # str
+            'limit': int(self.limit),  # int
+            'floor': self.floor,  # int
+            'ceiling': self.ceiling,  # int
+            'active': self.active,  # int
+            'queued': self.queued,  # int
+            'decreases': self.decreases,  # int
+        }
+
+
+class Slot:
+    """Async context manager for a single request; Call response() when the
+    response status is received so the latency is measured up to the first
+    response and is not affected by the size of the response."""
+
+    __slots__ = ('limiter', 'start', 'wait', 'latency', 'status')
+
+    def __init__(self, limiter: Limiter):
+        self.limiter = limiter
+        self.start = 0.0
+        self.wait = 0.0  # time in the queue in seconds
+        self.latency: float | None = None
+        self.status: int | None = None
+
+    async def __aenter__(self) -> 'Slot':
+        queued = time.perf_counter()
+        self.start = await self.limiter.acquire()
+        self.wait = self.start - queued
+        return self
+
+    def response(self, status: int):
+        self.latency = time.perf_counter() - self.start
+        self.status = status
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            # cancelled or generator closed; not a result of the request
+            self.limiter.release()
+        elif self.status is None:
+            self.limiter.release(self.start, ok=False)
+        else:
+            # failing to read or decode a success response counts as an
+            # error, client errors like 401 or 404 are fine
+            ok = self.status < 500 and (
+                exc_type is None or self.status // 100 != 2)
+            self.limiter.release(self.start, self.latency, ok)
+
+
+# Limiter by asset Id
+_limiters: dict[int, Limiter] = {}
+
+
+def get_limiter(asset: Asset, config: dict) -> Limiter:
+    floor = config.get('min_requests', DEF_FLOOR)
+    ceiling = config.get('max_requests', DEF_CEILING)
+    limiter = _limiters.get(asset.id)
+    if limiter is None:
+        limiter = _limiters[asset.id] = Limiter(floor, ceiling)
+    elif limiter.floor != floor or limiter.ceiling != ceiling:
+        limiter.set_bounds(floor, ceiling)
+    return limiter
+
+
+def find_limiter(asset_id: int) -> Limiter | None:
+    return _limiters.get(asset_id)
@@ -0,0 +1,177 @@
+import asyncio
+import bisect
+import logging
+import time
+from collections import defaultdict
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (
+    .001, .002, .005, .01, .02, .05, .1, .2, .5, 1., 2., 5., 10., 30., 60.)
+
+# Request phases; queue is the time waiting for the per-asset limiter,
+# connect includes the TLS handshake which is not reported separately by
+# aiohttp, decode is JSON decoding of the response body
+PHASES = ('queue', 'dns', 'connect', 'ttfb', 'body', 'decode')
+
+# Interval in seconds for the debug log summary
+SUMMARY_INTERVAL = 300
+
+# Statistics by asset are only kept for assets with the self-monitoring
+# check, which must have run within this amount of seconds
+ASSET_STATS_TTL = 3600.0
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def avg(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p: float) -> float | None:
+        """Returns the upper bound of the bucket containing percentile p,
+        limited to the maximum value."""
+        if not self.count:
+            return None
+        n = p * self.count
+        i = 0
+        for i, count in enumerate(self.counts):
+            n -= count
+            if n <= 0:
+                break
+        return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+
+
+class EndpointStats:
+    __slots__ = (
+        'phases', 'requests', 'errors', 'bytes', 'reused', 'coalesced')
+
+    def __init__(self):
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.requests = 0
+        self.errors = 0  # exceptions and error responses
+        self.bytes = 0
+        self.reused = 0  # requests using a keep-alive connection
+        self.coalesced = 0  # requests sharing an identical request
+
+
+# Statistics by asset Id and endpoint since the last self-monitoring check
+# and by endpoint since the last log summary
+_assets: dict[int, dict[str, EndpointStats]] = defaultdict(dict)
+_summary: dict[str, EndpointStats] = {}
+_summary_task: asyncio.Future | None = None
+
+# Time of the last self-monitoring check by asset Id
+_monitored: dict[int, float] = {}
+
+
+def _get(asset_id: int, endpoint: str) -> tuple[EndpointStats, ...]:
+    summary = _summary.get(endpoint)
+    if summary is None:
+        summary = _summary[endpoint] = EndpointStats()
+    if asset_id not in _monitored:
+        return summary,
+
+    endpoints = _assets[asset_id]
+    stats = endpoints.get(endpoint)
+    if stats is None:
+        stats = endpoints[endpoint] = EndpointStats()
+    return stats, summary
+
+
+def add_timing(asset_id: int, endpoint: str, phase: str, value: float):
+    for stats in _get(asset_id, endpoint):
+        stats.phases[phase].add(value)
+
+
+def add_request(asset_id: int, endpoint: str, status: int | None,
+                reused: bool):
+    for stats in _get(asset_id, endpoint):
+        stats.requests += 1
+        if status is None or status >= 400:
+            stats.errors += 1
+        if reused:
+            stats.reused += 1
+
+
+def add_bytes(asset_id: int, endpoint: str, size: int):
+    for stats in _get(asset_id, endpoint):
+        stats.bytes += size
+
+
+def add_coalesced(asset_id: int, endpoint: str):
+    for stats in _get(asset_id, endpoint):
+        stats.coalesced += 1
+
+
+def pop_asset(asset_id: int) -> dict[str, EndpointStats]:
+    """Returns the statistics since the previous call for the asset; The
+    statistics for an asset are only kept after the first call."""
+    _monitored[asset_id] = time.monotonic()
+    return _assets.pop(asset_id, {})
+
+
+def _expire_assets():
+    expired = time.monotonic() - ASSET_STATS_TTL
+    for asset_id, ts in tuple(_monitored.items()):
+        if ts < expired:
+            del _monitored[asset_id]
+            _assets.pop(asset_id, None)
+
+
+def _ms(value: float | None) -> float | None:
+    return None if value is None else round(value * 1000.0, 1)
+
+
+def endpoint_item(endpoint: str, stats: EndpointStats) -> dict:
+    item = {
+        'name': endpoint,  # str
+        'requests': stats.requests,  # int
+        'errors': stats.errors,  # int
+        'bytes': stats.bytes,  # int
+        'reused': stats.reused,  # int
+        'coalesced': stats.coalesced,  # int
+    }
+    for phase, histogram in stats.phases.items():
+        item[f'{phase}_avg'] = _ms(histogram.avg())  # float? (ms)
+        item[f'{phase}_p95'] = _ms(histogram.percentile(.95))  # float? (ms)
+        item[f'{phase}_max'] = _ms(histogram.max or None)  # float? (ms)
+    return item
+
+
+async def _log_summary():
+    global _summary
+    while True:
+        await asyncio.sleep(SUMMARY_INTERVAL)
+        _expire_assets()
+        summary, _summary = _summary, {}
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            continue
+        for endpoint, stats in sorted(summary.items()):
+            item = endpoint_item(endpoint, stats)
+            phases = ' '.join(
+                f'{phase}={item[f"{phase}_avg"]}/{item[f"{phase}_p95"]}'
+                for phase in PHASES)
+            logging.debug(
+                f'{endpoint}: {stats.requests} requests, '
+                f'{stats.errors} errors, {stats.bytes} bytes, '
+                f'{stats.reused} reused, {stats.coalesced} coalesced; '
+                f'avg/p95 ms: {phases}')
+
+
+def start_summary():
+    global _summary_task
+    if _summary_task is None or _summary_task.done():
+        _summary_task = asyncio.ensure_future(_log_summary())
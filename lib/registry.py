@@ -0,0 +1,97 @@
+"""Check registry; Check modules (and aiohttp) are imported on first use so
+the probe starts without importing all check implementations. The import is
+done in a thread so it does not block the checks which are running."""
+import abc
+import asyncio
+import importlib
+import logging
+import time
+from typing import cast
+from libprobe.asset import Asset
+from libprobe.check import Check
+from .deadline import set_deadline
+
+# Check key and the check class as `module:class` in the order of main.py
+CHECKS = (
+    ('alerts', 'lib.check.alerts:CheckAlerts'),
+    ('disks', 'lib.check.disks:CheckDisks'),
+    ('hardware', 'lib.check.hardware:CheckHardware'),
+    ('memory', 'lib.check.memory:CheckMemory'),
+    ('network', 'lib.check.network:CheckNetwork'),
+    ('pools', 'lib.check.pools:CheckPools'),
+    ('problems', 'lib.check.problems:CheckProblems'),
+    ('storage', 'lib.check.storage:CheckStorage'),
+    ('system', 'lib.check.system:CheckSystem'),
+
+    # Self-monitoring
+    ('probe', 'lib.check.probe:CheckProbe'),
+
+    # Analytics checks
+    ('analytics', 'lib.check.analytics:CheckAnalytics'),
+    ('cpu', 'lib.check.cpu:CheckCpu'),
+    ('io', 'lib.check.io:CheckIo'),
+)
+
+# Import time in seconds by check module, including the modules imported by
+# the check module which were not imported before
+import_times: dict[str, float] = {}
+
+# Check classes by path which are imported
+_loaded: dict[str, type[Check]] = {}
+
+
+def load(path: str) -> type[Check]:
+    check = _loaded.get(path)
+    if check is not None:
+        return check
+
+    module_name, name = path.split(':')
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if module_name not in import_times:
+        import_times[module_name] = duration = time.perf_counter() - start
+        logging.debug(f'imported {module_name} in {duration * 1e3:.1f} ms')
+    check = _loaded[path] = getattr(module, name)
+    return check
+
+
+async def load_async(path: str) -> type[Check]:
+    """Like load() but a check module which is not imported yet is imported
+    in a thread."""
+    check = _loaded.get(path)
+    if check is not None:
+        return check
+    return await asyncio.get_running_loop().run_in_executor(None, load, path)
+
+
+class _LazyCheckMeta(abc.ABCMeta):
+    path: str
+
+    @property
+    def unchanged_eol(cls) -> int:
+        return load(cls.path).unchanged_eol
+
+
+def _lazy(key: str, path: str) -> type[Check]:
+    async def run(asset: Asset, local_config: dict, config: dict) -> dict:
+        set_deadline(config)
+        check = await load_async(path)
+        return await check.run(asset, local_config, config)
+
+    return cast(type[Check], _LazyCheckMeta(
+        f'Lazy{path.split(":")[1]}', (Check, ), {
+            'key': key,
+            'path': path,
+            'run': staticmethod(run),
+        }))
+
+
+def get_checks() -> tuple[type[Check], ...]:
+    """Returns check classes which import the check implementation when
+    used; The `path` attribute is the implementation as `module:class`."""
+    return tuple(_lazy(key, path) for key, path in CHECKS)
+
+
+async def close_sessions():
+    from .connector import close_sessions
+    await close_sessions()
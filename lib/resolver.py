@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+# Resolved addresses are re-used for this amount of seconds
+DNS_CACHE_TTL = float(os.getenv('DNS_CACHE_TTL', '60'))
+
+# Failed lookups are re-used for this amount of seconds so an unknown host
+# does not result in a lookup for every request
+DNS_NEGATIVE_TTL = float(os.getenv('DNS_NEGATIVE_TTL', '10'))
+
+
+def _with_port(result: list[ResolveResult], port: int
+               ) -> list[ResolveResult]:
+    hosts = []
+    for res in result:
+        res = res.copy()
+        res['port'] = port
+        hosts.append(res)
+    return hosts
+
+
+class CachingResolver(AbstractResolver):
+    """Resolver which caches the addresses (and failures) for all sessions;
+    Concurrent lookups for the same host wait for a single lookup."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self._resolver = DefaultResolver(loop=loop)
+        self._cache: dict[
+            tuple, tuple[float, list[ResolveResult] | OSError]] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.hits = 0  # including failed lookups
+        self.misses = 0
+        self.failures = 0
+        self.refreshes = 0  # removed after a connect failure
+
+    async def resolve(self, host: str, port: int = 0,
+                      family: socket.AddressFamily = socket.AF_INET
+                      ) -> list[ResolveResult]:
+        # the addresses are the same for all ports of the host
+        key = host, family
+        try:
+            expire, result = self._cache[key]
+        except KeyError:
+            pass
+        else:
+            if expire > time.monotonic():
+                self.hits += 1
+                if isinstance(result, OSError):
+                    raise type(result)(*result.args)
+                return _with_port(result, port)
+            del self._cache[key]
+
+        fut = self._inflight.get(key)
+        if fut is None:
+            self.misses += 1
+            fut = self._inflight[key] = asyncio.ensure_future(
+                self._lookup(host, port, family))
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        result = await asyncio.shield(fut)
+        return _with_port(result, port)
+
+    async def _lookup(self, host: str, port: int,
+                      family: socket.AddressFamily) -> list[ResolveResult]:
+        key = host, family
+        try:
+            result = await self._resolver.resolve(host, port, family)
+        except OSError as e:
+            self.failures += 1
+            logging.debug(f'failed to resolve {host}: {e}')
+            self._cache[key] = time.monotonic() + DNS_NEGATIVE_TTL, e
+            raise
+        self._cache[key] = time.monotonic() + DNS_CACHE_TTL, result
+        return result
+
+    def invalidate(self, host: str):
+        """Forces a new lookup for the host, for example after a connect
+        failure as the address of the host might have changed."""
+        keys = [key for key in self._cache if key[0] == host]
+        for key in keys:
+            del self._cache[key]
+        self.refreshes += bool(keys)
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'failures': self.failures,
+            'refreshes': self.refreshes,
+        }
+
+    async def close(self):
+        # shared by all connectors; the default resolver has nothing to release
+        pass
+
+
+_resolver: CachingResolver | None = None
+
+
+def get_resolver() -> CachingResolver:
+    global _resolver
+    loop = asyncio.get_running_loop()
+    if _resolver is None or _resolver.loop is not loop:
+        _resolver = CachingResolver(loop)
+    return _resolver
+
+
+def find_resolver() -> CachingResolver | None:
+    return _resolver
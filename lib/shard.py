@@ -0,0 +1,326 @@
+"""Runs checks in worker processes; Assets are divided over the workers
+using consistent hashing so all checks for an asset run in the same worker
+and share the session, token and caches for that asset.
+
+The parent process keeps the AgentCore connection and the scheduling, only
+check.run() is executed by a worker. The processes exchange length-prefixed
+pickles over a socket pair which both read and write with asyncio streams,
+so a large result never blocks the event loop of either process.
+"""
+import asyncio
+import bisect
+import hashlib
+import importlib
+import logging
+import multiprocessing
+import pickle
+import socket
+import struct
+import time
+from multiprocessing.process import BaseProcess
+from typing import Any
+from libprobe import logger
+from libprobe.asset import Asset
+from libprobe.check import Check
+from libprobe.exceptions import CheckException, IgnoreCheckException
+from libprobe.exceptions import IgnoreResultException
+from libprobe.exceptions import IncompleteResultException, NoCountException
+from libprobe.severity import Severity
+from .check.probe import CheckProbe, get_unchanged
+from .deadline import set_deadline
+
+# Points per worker on the hash ring
+VNODES = 160
+
+# Length of a pickled message
+_HEADER = struct.Struct('!I')
+
+# A stopped worker is restarted on the next request after RESTART_DELAY
+# seconds, doubled for each stop without a reply in between up to
+# MAX_RESTART_DELAY; Requests before that fail
+RESTART_DELAY = 1.0
+MAX_RESTART_DELAY = 300.0
+
+# Seconds to wait for a worker process to exit
+JOIN_TIMEOUT = 5.0
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    def __init__(self, n: int):
+        points = sorted(
+            (_hash(f'worker-{i}-{v}'), i)
+            for i in range(n) for v in range(VNODES))
+        self._keys = [key for key, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def get(self, asset_id: int) -> int:
+        idx = bisect.bisect(self._keys, _hash(str(asset_id)))
+        return self._workers[idx % len(self._workers)]
+
+
+def _exc_to_tuple(e: Exception) -> tuple:
+    if isinstance(e, NoCountException):
+        severity = e.severity.value if e.is_exception else None
+        return type(e).__name__, str(e), severity, e.result
+    if isinstance(e, CheckException):
+        return type(e).__name__, str(e), e.severity.value, \
+            getattr(e, 'result', None)
+    return type(e).__name__, str(e) or type(e).__name__, None, None
+
+
+def _exc_from_tuple(name: str, msg: str, severity: int | None,
+                    result: dict | None) -> Exception:
+    sev = None if severity is None else Severity(severity)
+    if name == 'NoCountException':
+        assert result is not None
+        return NoCountException(msg, result, sev)
+    if name == 'IncompleteResultException':
+        assert result is not None and sev is not None
+        return IncompleteResultException(msg, result, sev)
+    if name == 'CheckException' and sev is not None:
+        return CheckException(msg, sev)
+    if name == 'IgnoreResultException':
+        return IgnoreResultException(msg)
+    if name == 'IgnoreCheckException':
+        return IgnoreCheckException(msg)
+    return Exception(msg)
+
+
+def _pack(msg: tuple) -> bytes:
+    data = pickle.dumps(msg, pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(data)) + data
+
+
+async def _recv(reader: asyncio.StreamReader) -> tuple:
+    header = await reader.readexactly(_HEADER.size)
+    size, = _HEADER.unpack(header)
+    return pickle.loads(await reader.readexactly(size))
+
+
+def _import(path: str) -> type[Check]:
+    module, name = path.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _worker_main(index: int, sock: socket.socket, paths: dict[str, str]):
+    logger.setup_logger(name=f'worker-{index}')
+    checks = {key: _import(path) for key, path in paths.items()}
+
+    from .connector import close_sessions
+    from .utils import TOKEN_FILE, set_token_file
+
+    # Each worker uses its own token file as the tokens are for the assets
+    # of this worker only
+    if TOKEN_FILE:
+        set_token_file(f'{TOKEN_FILE}.{index}')
+
+    async def serve():
+        reader, writer = await asyncio.open_connection(sock=sock)
+        tasks: dict[int, asyncio.Task] = {}
+
+        async def run(req_id: int, check: type[Check], asset: Asset,
+                      local_config: dict, config: dict):
+            set_deadline(config)
+            try:
+                result = await check.run(asset, local_config, config)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                msg = ('error', req_id, _exc_to_tuple(e))
+            else:
+                msg = ('ok', req_id, result)
+            finally:
+                tasks.pop(req_id, None)
+            try:
+                writer.write(_pack(msg))
+                await writer.drain()
+            except Exception as e:
+                logging.error(f'worker {index} failed to reply: {e}')
+
+        while True:
+            try:
+                msg = await _recv(reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            if msg[0] == 'run':
+                _, req_id, key, asset, local_config, config = msg
+                tasks[req_id] = asyncio.ensure_future(
+                    run(req_id, checks[key], asset, local_config, config))
+            elif msg[0] == 'cancel':
+                task = tasks.get(msg[1])
+                if task is not None:
+                    task.cancel()
+
+        for task in tasks.values():
+            task.cancel()
+        writer.close()
+        await close_sessions()
+
+    asyncio.run(serve())
+
+
+class _Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process: BaseProcess | None = None
+        self.sock: socket.socket | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.reading: asyncio.Task | None = None
+        self.lock = asyncio.Lock()
+        self.pending: dict[int, asyncio.Future] = {}
+        self.stops = 0  # without a reply in between
+        self.restart = 0.0  # monotonic time
+
+
+class WorkerPool:
+    """Pool of worker processes which run checks for their share of the
+    assets; Use wrap() to get check classes which run in a worker."""
+
+    def __init__(self, n: int, checks: tuple[type[Check], ...]):
+        self._ring = HashRing(n)
+        self._workers = [_Worker(i) for i in range(n)]
+        self._paths = {
+            check.key: getattr(
+                check, 'path', f'{check.__module__}:{check.__qualname__}')
+            for check in checks}
+        self._next_id = 0
+        self._ctx = multiprocessing.get_context('spawn')
+
+    def start(self):
+        for worker in self._workers:
+            worker.process, worker.sock = self._spawn(worker.index)
+
+    def _spawn(self, index: int) -> tuple[BaseProcess, socket.socket]:
+        parent, child = socket.socketpair()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, child, self._paths),
+            name=f'worker-{index}',
+            daemon=True)
+        process.start()
+        child.close()
+        logging.info(f'started worker {index} (pid {process.pid})')
+        return process, parent
+
+    async def _connect(self, worker: _Worker) -> asyncio.StreamWriter:
+        async with worker.lock:
+            if worker.writer is None:
+                if worker.sock is None:
+                    await self._restart(worker)
+                reader, worker.writer = \
+                    await asyncio.open_connection(sock=worker.sock)
+                worker.reading = asyncio.ensure_future(
+                    self._read(worker, reader))
+            return worker.writer
+
+    async def _restart(self, worker: _Worker):
+        wait = worker.restart - time.monotonic()
+        if wait > 0:
+            raise Exception(
+                f'worker {worker.index} has stopped; '
+                f'restart in {wait:.1f} seconds')
+
+        # the process is started in a thread as starting the interpreter
+        # would block the checks of the other workers
+        worker.process, worker.sock = await asyncio.get_running_loop() \
+            .run_in_executor(None, self._spawn, worker.index)
+
+    async def _stop(self, worker: _Worker):
+        # called with the lock of the worker
+        if worker.writer is not None:
+            worker.writer.close()
+            worker.writer = None
+        elif worker.sock is not None:
+            worker.sock.close()
+        worker.sock = None
+
+        process = worker.process
+        if process is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, process.join, JOIN_TIMEOUT)
+            if process.is_alive():
+                process.kill()
+                await loop.run_in_executor(None, process.join, JOIN_TIMEOUT)
+            worker.process = None
+
+    async def _read(self, worker: _Worker, reader: asyncio.StreamReader):
+        while True:
+            try:
+                msg = await _recv(reader)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+
+            worker.stops = 0
+            status, req_id, value = msg
+            fut = worker.pending.pop(req_id, None)
+            if fut is None or fut.done():
+                continue
+            if status == 'ok':
+                fut.set_result(value)
+            else:
+                fut.set_exception(_exc_from_tuple(*value))
+
+        delay = min(RESTART_DELAY * 2 ** worker.stops, MAX_RESTART_DELAY)
+        worker.stops += 1
+        worker.restart = time.monotonic() + delay
+        logging.error(
+            f'worker {worker.index} has stopped; restart in {delay:.1f} '
+            'seconds')
+        for fut in worker.pending.values():
+            if not fut.done():
+                fut.set_exception(Exception('worker has stopped'))
+        worker.pending.clear()
+
+        # the process is joined so it does not remain as a zombie
+        async with worker.lock:
+            worker.reading = None
+            await self._stop(worker)
+
+    async def run(self, key: str, asset: Asset, local_config: dict,
+                  config: dict) -> Any:
+        worker = self._workers[self._ring.get(asset.id)]
+        writer = await self._connect(worker)
+
+        self._next_id += 1
+        req_id = self._next_id
+        fut = worker.pending[req_id] = \
+            asyncio.get_running_loop().create_future()
+        try:
+            writer.write(
+                _pack(('run', req_id, key, asset, local_config, config)))
+            await writer.drain()
+            return await fut
+        except asyncio.CancelledError:
+            worker.pending.pop(req_id, None)
+            if not writer.is_closing():
+                writer.write(_pack(('cancel', req_id)))
+            raise
+
+    def wrap(self, checks: tuple[type[Check], ...]
+             ) -> tuple[type[Check], ...]:
+        return tuple(self._wrap(check) for check in checks)
+
+    def _wrap(self, check: type[Check]) -> type[Check]:
+        pool = self
+
+        async def run(asset: Asset, local_config: dict, config: dict):
+            result = await pool.run(check.key, asset, local_config, config)
+            if check.key == CheckProbe.key:
+                # suppressed results are counted by the parent process
+                result['unchanged'] = get_unchanged(asset.id)
+            return result
+
+        return type(check.__name__, (check, ), {'run': staticmethod(run)})
+
+    async def close(self):
+        for worker in self._workers:
+            if worker.reading is not None:
+                worker.reading.cancel()
+                worker.reading = None
+            async with worker.lock:
+                await self._stop(worker)
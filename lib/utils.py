@@ -1,10 +1,22 @@
-import asyncio
 import aiohttp
+import asyncio
+import json
+import os
 import time
 import logging
 from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable
+from urllib.parse import quote
 from libprobe.asset import Asset
-from .connector import get_connector
+from libprobe.exceptions import IncompleteResultException
+from .cache import CacheEntry, response_cache
+from .codec import loads
+from .connector import get_session
+from . import deadline
+from .deadline import DEF_INTERVAL
+from . import metrics
+from .jsonstream import ItemStream
+from .limiter import get_limiter
 
 DEF_API_VERSION = 'v2'  # v1 or v2
 DEF_SECURE = True
@@ -13,58 +25,215 @@ DEF_PORT = 215
 # MAX_TOKEN_AGE is usually 15 minutes, we choose 12 minutes to be safe
 MAX_TOKEN_AGE = 720
 
-# Token registration; Prevent new tokens for each request
-_tokens: dict[int, tuple[float, str]] = dict()
+# Tokens older than TOKEN_REFRESH_AGE are renewed in the background while the
+# current token is still used; a part based on the asset Id (up to
+# TOKEN_REFRESH_JITTER) spreads the logins over time
+TOKEN_REFRESH_AGE = 480
+TOKEN_REFRESH_JITTER = 120
+
+# Maximum number of simultaneous logins, over all assets
+MAX_LOGINS = 5
+
+# Optional file for storing tokens so a restart can re-use valid tokens
+TOKEN_FILE = os.getenv('TOKEN_FILE', '')
+
+# Analytics spans in seconds; Per-second samples are requested with the
+# smallest span which covers the check interval
+ANALYTICS_SPANS = (
+    (60, 'minute'),
+    (3600, 'hour'),
+    (86400, 'day'),
+)
+
+# The system endpoints are requested together for the disks, memory and
+# system checks; A snapshot is re-used by the other checks for this amount of
+# seconds (with the check interval as maximum)
+SYSTEM_SNAPSHOT_AGE = 60.0
+SYSTEM_ENDPOINTS = ('disks', 'memory', 'version')
+
+# A snapshot only includes the endpoints requested within this number of
+# check intervals, so the endpoints of disabled checks are not requested
+SYSTEM_REQUESTED_INTERVALS = 2
+
+# Cache time for the version info, which changes only after an update
+DEF_VERSION_TTL = 3600  # seconds, re-validated afterwards when supported
+
+# Collections in a path which are followed by an Id, see _endpoint()
+_ID_COLLECTIONS = frozenset(
+    ('pools', 'projects', 'filesystems', 'luns', 'datasets'))
+
+# Chunk size in bytes for streaming responses
+CHUNK_SIZE = 2 ** 16
+
+# Token registration; Prevent new tokens for each request. For each asset the
+# login time, token and the address the token is valid for are stored.
+_tokens: dict[int, tuple[float, str, str]] = dict()
 _locks: dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+_logins = asyncio.Semaphore(MAX_LOGINS)
+_refresh: dict[int, asyncio.Future] = {}
+_credentials: dict[int, tuple[dict, dict]] = {}
+
+# Single-flight; Identical requests for an asset which are in flight share one
+# task, the waiters are counted so the task is cancelled when no one is
+# waiting.
+_inflight: dict[tuple[int, str, int, str, float | None], asyncio.Task] = {}
+_waiters: dict[asyncio.Task, int] = {}
+
+# Analytics cache; Data with span=minute is re-used within the same minute
+_analytics: dict[int, dict[str, tuple[int, dict]]] = defaultdict(dict)
+
+# System snapshot by asset; The time the snapshot was started, the endpoints
+# and the task
+_system: dict[int, tuple[float, tuple[str, ...], asyncio.Task]] = {}
+_system_requested: dict[int, dict[str, float]] = defaultdict(dict)
+
+
+def get_address(asset: Asset, config: dict) -> str:
+    address = config.get('address')
+    if not address:
+        address = asset.name
+    return address
+
+
+def get_url(asset: Asset, config: dict, api: str,
+            path: str) -> tuple[str, int, str]:
+    """Returns the address, port and URL for the given API and path."""
+    address = get_address(asset, config)
+    api_version = config.get('version', DEF_API_VERSION)
+    secure = config.get('secure', DEF_SECURE)
+    port = config.get('port', DEF_PORT)
+
+    protocol = 'https' if secure else 'http'
+    url = f'{protocol}://{address}:{port}/api/{api}/{api_version}/{path}'
+    return address, port, url
+
+
+class Unauthorized(Exception):
+    """Raised on a 401 response; the token is no longer valid."""
+    pass
+
+
+def _load_tokens():
+    try:
+        with open(TOKEN_FILE, 'r') as fp:
+            tokens = json.load(fp)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logging.warning(f'failed to read `{TOKEN_FILE}`: {e}')
+        return
+
+    now = time.time()
+    for asset_id, (ts, token, address) in tokens.items():
+        if ts + MAX_TOKEN_AGE > now:
+            _tokens[int(asset_id)] = ts, token, address
+
+
+def _save_tokens():
+    tmp = f'{TOKEN_FILE}.tmp'
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, 'w') as fp:
+            json.dump(_tokens, fp)
+        os.replace(tmp, TOKEN_FILE)
+    except Exception as e:
+        logging.warning(f'failed to write `{TOKEN_FILE}`: {e}')
+
+
+if TOKEN_FILE:
+    _load_tokens()
+
+
+def set_token_file(token_file: str):
+    """Replaces the token file and (re-)loads the tokens from the new file;
+    Used by worker processes which each have their own token file."""
+    global TOKEN_FILE
+    TOKEN_FILE = token_file
+    _tokens.clear()
+    if TOKEN_FILE:
+        _load_tokens()
+
+
+async def _login(asset: Asset, local_config: dict, config: dict) -> str:
+    try:
+        username = local_config['username']
+        password = local_config['password']
+    except KeyError:
+        raise Exception(
+            'missing username or password in local asset config')
+
+    headers = {
+        'X-Auth-User': username,
+        'X-Auth-Key': password
+    }
+    address, port, url = get_url(asset, config, 'access', '')
+    url = url.rstrip('/')
+
+    async with _logins:
+        logging.info(f'POST {url}')
+
+        session = get_session(address, port)
+        async with session.post(url, headers=headers, ssl=False,
+                                trace_request_ctx=_trace_ctx(asset, 'access')
+                                ) as resp:
+            assert resp.status // 100 == 2, \
+                f'response status code: {resp.status}. ' \
+                f'reason: {resp.reason}.'
+            token = resp.headers.get('X-Auth-Session')
+            assert token, 'missing `X-Auth-Session` token in response'
+
+    # Resister the token with the current time-stamp
+    _tokens[asset.id] = time.time(), token, address
+    if TOKEN_FILE:
+        _save_tokens()
+
+    return token
+
+
+async def _refresh_token(asset: Asset, local_config: dict, config: dict):
+    try:
+        await _login(asset, local_config, config)
+    except Exception as e:
+        msg = str(e) or type(e).__name__
+        logging.warning(f'failed to refresh token: {msg}; {asset}')
+    finally:
+        del _refresh[asset.id]
 
 
 async def get_token(
         asset: Asset,
         local_config: dict,
         config: dict) -> str:
+    _credentials[asset.id] = local_config, config
+    address = get_address(asset, config)
+
     async with _locks[asset.id]:
         token_reg = _tokens.get(asset.id)
         if token_reg is not None:
-            ts, token = token_reg
-            if ts + MAX_TOKEN_AGE > time.time():
+            ts, token, token_address = token_reg
+            age = time.time() - ts
+            if age < MAX_TOKEN_AGE and token_address == address:
+                refresh_age = \
+                    TOKEN_REFRESH_AGE + asset.id % TOKEN_REFRESH_JITTER
+                if age > refresh_age and asset.id not in _refresh:
+                    _refresh[asset.id] = asyncio.ensure_future(
+                        _refresh_token(asset, local_config, config))
                 return token
 
-        address = config.get('address')
-        if not address:
-            address = asset.name
+        return await _login(asset, local_config, config)
 
-        api_version = config.get('version', DEF_API_VERSION)
-        secure = config.get('secure', DEF_SECURE)
-        port = config.get('port', DEF_PORT)
 
-        try:
-            username = local_config['username']
-            password = local_config['password']
-        except KeyError:
-            raise Exception(
-                'missing username or password in local asset config')
-
-        headers = {
-            'X-Auth-User': username,
-            'X-Auth-Key': password
-        }
-        protocol = 'https' if secure else 'http'
-        url = f'{protocol}://{address}:{port}/api/access/{api_version}'
-
-        logging.info(f'POST {url}')
-
-        async with aiohttp.ClientSession(connector=get_connector()) as session:
-            async with session.post(url, headers=headers, ssl=False) as resp:
-                assert resp.status // 100 == 2, \
-                    f'response status code: {resp.status}. ' \
-                    f'reason: {resp.reason}.'
-                token = resp.headers.get('X-Auth-Session')
-                assert token, 'missing `X-Auth-Session` token in response'
-
-        # Resister the token with the current time-stamp
-        _tokens[asset.id] = time.time(), token
+async def renew_token(asset: Asset, token: str) -> str:
+    """Invalidates the given token and returns a new token; This requires
+    get_token() to be called for the asset before."""
+    async with _locks[asset.id]:
+        token_reg = _tokens.get(asset.id)
+        if token_reg is not None and token_reg[1] != token:
+            return token_reg[1]  # renewed by another request
 
-        return token
+        _tokens.pop(asset.id, None)
+        local_config, config = _credentials[asset.id]
+        return await _login(asset, local_config, config)
 
 
 def as_int(d: dict, k: str) -> int | None:
@@ -79,28 +248,375 @@ def as_float(d: dict, k: str) -> float | None:
         return float(x)
 
 
-async def get_analytics(asset: Asset, config: dict, token: str,
-                        dataset: str) -> dict:
-    address = config.get('address')
-    if not address:
-        address = asset.name
+def _trace_ctx(asset: Asset, endpoint: str) -> dict[str, Any]:
+    # request statistics, see get_trace_config() in lib/connector.py
+    return {'asset_id': asset.id, 'endpoint': endpoint}
+
+
+def _endpoint(api: str, path: str) -> str:
+    # the item following one of these is an Id (for example a pool name) and
+    # is replaced so the statistics are by endpoint and not by resource
+    parts = path.split('?', 1)[0].split('/')
+    for i in range(1, len(parts)):
+        if parts[i - 1] in _ID_COLLECTIONS:
+            parts[i] = '*'
+    return f'{api}/{"/".join(parts)}'
+
+
+def _timeout(retry: bool) -> aiohttp.ClientTimeout:
+    timeout = deadline.request_timeout(retry)
+    if timeout is None:
+        return aiohttp.client.DEFAULT_TIMEOUT
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+def _check_status(resp: aiohttp.ClientResponse):
+    if resp.status == 401:
+        raise Unauthorized(
+            f'response status code: {resp.status}. reason: {resp.reason}.')
+    assert resp.status // 100 == 2, \
+        f'response status code: {resp.status}. reason: {resp.reason}.'
+
+
+async def get_data(asset: Asset, config: dict, token: str,
+                   api: str, path: str, ttl: float | None = None) -> dict:
+    """Returns the decoded response for a GET request to the given API.
+
+    Example: get_data(asset, config, token, 'system', 'disks') requests
+             /api/system/v2/disks (for API version v2)
+
+    When a `ttl` is given, the response is cached for `ttl` seconds and
+    after expiration re-validated using ETag or Last-Modified if the
+    appliance supports this; With a `ttl` of 0 the response is re-validated
+    on each request and only cached when the appliance supports this. Cached
+    data must not be modified.
+
+    When the token is rejected, the request is retried once with a new token.
+    A time-out or connection error is retried once when the deadline of the
+    check leaves enough time (see lib/deadline.py).
+
+    Concurrent requests of an asset for the same address, port and path
+    (including the query) with the same `ttl` share a single request, made
+    with the token of the first caller, and receive the same data; Like
+    cached data, the returned data must not be modified.
+    """
+    address, port, url = get_url(asset, config, api, path)
+    key = asset.id, address, port, url, ttl
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = asyncio.ensure_future(
+            _get_data_retry(asset, config, token, api, path, ttl))
+        task.add_done_callback(lambda t: _inflight_done(key, t))
+        _waiters[task] = 1
+    else:
+        metrics.add_coalesced(asset.id, _endpoint(api, path))
+        _waiters[task] += 1
+
+    try:
+        return await asyncio.shield(task)
+    finally:
+        waiters = _waiters[task] - 1
+        if waiters:
+            _waiters[task] = waiters
+        else:
+            del _waiters[task]
+            if not task.done():
+                task.cancel()
+
+
+def _inflight_done(key: tuple[int, str, int, str, float | None],
+                   task: asyncio.Task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+
+
+async def _get_data_retry(asset: Asset, config: dict, token: str,
+                          api: str, path: str, ttl: float | None) -> dict:
+    try:
+        return await _get_data_auth(
+            asset, config, token, api, path, ttl, False)
+    except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+        # a GET is safe to retry when the check deadline allows
+        delay = deadline.retry_delay()
+        if delay is None:
+            raise
+        msg = str(e) or type(e).__name__
+        logging.debug(f'retry {api}/{path} in {delay:.2f}s: {msg}; {asset}')
+        await asyncio.sleep(delay)
+        return await _get_data_auth(
+            asset, config, token, api, path, ttl, True)
+
+
+async def _get_data_auth(asset: Asset, config: dict, token: str,
+                         api: str, path: str, ttl: float | None,
+                         retry: bool) -> dict:
+    try:
+        return await _get_data(asset, config, token, api, path, ttl, retry)
+    except Unauthorized:
+        token = await renew_token(asset, token)
+        return await _get_data(asset, config, token, api, path, ttl, retry)
+
+
+async def _get_data(asset: Asset, config: dict, token: str,
+                    api: str, path: str, ttl: float | None,
+                    retry: bool) -> dict:
+    address, port, url = get_url(asset, config, api, path)
     headers = {'X-Auth-Session': token}
-    api_version = config.get('version', DEF_API_VERSION)
-    secure = config.get('secure', DEF_SECURE)
-    port = config.get('port', DEF_PORT)
 
-    protocol = 'https' if secure else 'http'
-    url = (
-        f'{protocol}://{address}:{port}'
-        f'/api/analytics/{api_version}/datasets/{dataset}/data?span=minute'
-    )
+    key = asset.id, url
+    entry = None if ttl is None else response_cache.get(key)
+    if entry is not None:
+        if entry.expire > time.time():
+            response_cache.hits += 1
+            return entry.data
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
 
-    logging.info(f'GET {url}')
+    endpoint = _endpoint(api, path)
+    session = get_session(address, port)
+    async with get_limiter(asset, config).slot() as slot:
+        metrics.add_timing(asset.id, endpoint, 'queue', slot.wait)
+        logging.info(f'GET {url}')
 
-    async with aiohttp.ClientSession(connector=get_connector()) as session:
-        async with session.get(url, headers=headers, ssl=False) as resp:
-            assert resp.status // 100 == 2, \
-                f'response status code: {resp.status}. reason: {resp.reason}.'
-            data = await resp.json()
+        async with session.get(url, headers=headers, ssl=False,
+                               timeout=_timeout(retry),
+                               trace_request_ctx=_trace_ctx(asset, endpoint)
+                               ) as resp:
+            slot.response(resp.status)
+            if resp.status == 304 and entry is not None:
+                assert ttl is not None
+                response_cache.not_modified += 1
+                response_cache.set(key, entry._replace(
+                    expire=time.time() + ttl))
+                return entry.data
+
+            _check_status(resp)
+            start = time.perf_counter()
+            body = await resp.read()
+            read = time.perf_counter()
+            data = loads(body)
+            metrics.add_timing(asset.id, endpoint, 'body', read - start)
+            metrics.add_timing(
+                asset.id, endpoint, 'decode', time.perf_counter() - read)
+            metrics.add_bytes(asset.id, endpoint, len(body))
+
+            etag = resp.headers.get('ETag')
+            last_modified = resp.headers.get('Last-Modified')
+            if ttl is not None:
+                response_cache.misses += 1
+            # with ttl 0 the response is only cached for re-validation
+            if ttl is not None and (ttl or etag or last_modified):
+                response_cache.set(key, CacheEntry(
+                    expire=time.time() + ttl,
+                    etag=etag,
+                    last_modified=last_modified,
+                    size=len(body),
+                    data=data))
 
     return data
+
+
+async def iter_data(asset: Asset, config: dict, token: str,
+                    api: str, path: str, key: str) -> AsyncIterator[Any]:
+    """Yields the items from the list under `key` in the response while the
+    response is received. Use this for large lists instead of get_data() so
+    only a single item needs to be decoded in memory at a time.
+
+    Example: iter_data(asset, config, token, 'storage', 'luns', 'luns')
+    """
+    try:
+        async for item in _iter_data(asset, config, token, api, path, key):
+            yield item
+    except Unauthorized:
+        # raised before any item is returned
+        token = await renew_token(asset, token)
+        async for item in _iter_data(asset, config, token, api, path, key):
+            yield item
+
+
+async def _iter_data(asset: Asset, config: dict, token: str,
+                     api: str, path: str, key: str) -> AsyncIterator[Any]:
+    address, port, url = get_url(asset, config, api, path)
+    headers = {'X-Auth-Session': token}
+
+    endpoint = _endpoint(api, path)
+    session = get_session(address, port)
+    async with get_limiter(asset, config).slot() as slot:
+        metrics.add_timing(asset.id, endpoint, 'queue', slot.wait)
+        logging.info(f'GET {url} (streaming)')
+
+        # not retried as items might be returned already; The time-out
+        # includes handling the items
+        async with session.get(url, headers=headers, ssl=False,
+                               timeout=_timeout(True),
+                               trace_request_ctx=_trace_ctx(asset, endpoint)
+                               ) as resp:
+            slot.response(resp.status)
+            _check_status(resp)
+            stream = ItemStream(key)
+            start = time.perf_counter()
+            size = 0
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                size += len(chunk)
+                for item in stream.feed(chunk):
+                    yield item
+            for item in stream.close():
+                yield item
+            # body time includes decoding and handling the items as these
+            # are interleaved with receiving the response
+            metrics.add_timing(
+                asset.id, endpoint, 'body', time.perf_counter() - start)
+            metrics.add_bytes(asset.id, endpoint, size)
+
+
+async def get_many(asset: Asset, config: dict, token: str,
+                   requests: dict[str, tuple[str, str]],
+                   ttl: float | None = None
+                   ) -> tuple[dict[str, dict], dict[str, str]]:
+    """Requests multiple endpoints concurrently.
+
+    Argument `requests` maps a name to an (api, path) tuple as accepted by
+    get_data(). Returns the data and the error messages, both by name. When
+    all requests have failed, the first exception is raised instead.
+    """
+    return await gather_named(asset, {
+        name: get_data(asset, config, token, api, path, ttl)
+        for name, (api, path) in requests.items()})
+
+
+async def gather_named(asset: Asset, coros: dict[str, Awaitable[Any]]
+                       ) -> tuple[dict[str, Any], dict[str, str]]:
+    """Like get_many() but for any awaitable by name."""
+    names = tuple(coros)
+    results = await asyncio.gather(*coros.values(), return_exceptions=True)
+
+    data, errors = {}, {}
+    for name, res in zip(names, results):
+        if isinstance(res, BaseException):
+            if isinstance(res, asyncio.CancelledError):
+                raise res
+            errors[name] = str(res) or type(res).__name__
+            logging.debug(f'failed to get {name}: {errors[name]}; {asset}')
+        else:
+            data[name] = res
+
+    if not data and names:
+        raise next(res for res in results if isinstance(res, Exception))
+
+    return data, errors
+
+
+def raise_incomplete(errors: dict[str, str], state: dict):
+    """Raises IncompleteResultException when errors are returned by
+    get_many(); The state contains the successfully collected part.
+    """
+    if errors:
+        msg = ', '.join(f'{name} ({err})' for name, err in errors.items())
+        raise IncompleteResultException(f'failed to get {msg}', result=state)
+
+
+async def get_analytics(asset: Asset, config: dict, token: str,
+                        dataset: str) -> dict:
+    datasets = await get_analytics_many(asset, config, token, (dataset, ))
+    return datasets[dataset]
+
+
+async def get_analytics_many(asset: Asset, config: dict, token: str,
+                             datasets: tuple[str, ...]) -> dict[str, dict]:
+    """Returns analytics data (span=minute) by dataset name.
+
+    Datasets are requested concurrently; The result is cached per asset for
+    the current minute so other checks can use the same data.
+    """
+    minute = int(time.time() // 60)
+    cache = _analytics[asset.id]
+    for dataset, (m, _) in tuple(cache.items()):
+        if m != minute:
+            del cache[dataset]
+
+    async def fetch(dataset: str):
+        data = await get_data(
+            asset, config, token, 'analytics',
+            f'datasets/{quote(dataset, safe="")}/data?span=minute')
+        cache[dataset] = minute, data
+
+    missing = {dataset for dataset in datasets if dataset not in cache}
+    if missing:
+        await asyncio.gather(*(fetch(dataset) for dataset in missing))
+
+    return {dataset: cache[dataset][1] for dataset in datasets}
+
+
+async def get_analytics_samples(asset: Asset, config: dict, token: str,
+                                dataset: str) -> list[dict]:
+    """Returns the per-second analytics samples covering the check interval
+    (with a maximum of one day) using a single request.
+
+    The samples are not cached as each check needs its own interval.
+    """
+    seconds = config.get('_interval', DEF_INTERVAL)
+    span_seconds, span = next(
+        (span for span in ANALYTICS_SPANS if seconds <= span[0]),
+        ANALYTICS_SPANS[-1])
+    seconds = min(seconds, span_seconds)
+
+    start = time.strftime(
+        '%Y%m%dT%H:%M:%S', time.gmtime(time.time() - seconds))
+    data = await get_data(
+        asset, config, token, 'analytics',
+        f'datasets/{quote(dataset, safe="")}/data'
+        f'?startTime={start}&span={span}&granularity=second')
+    samples = data['data']
+    return samples if isinstance(samples, list) else [samples]
+
+
+def _get_system_data(asset: Asset, config: dict, token: str,
+                     name: str) -> Awaitable[dict]:
+    ttl = config.get('version_cache_ttl', DEF_VERSION_TTL) \
+        if name == 'version' else None
+    return get_data(asset, config, token, 'system', name, ttl)
+
+
+async def _get_system_snapshot(asset: Asset, config: dict, token: str,
+                               names: tuple[str, ...]
+                               ) -> tuple[dict[str, dict], dict[str, str]]:
+    return await gather_named(asset, {
+        name: _get_system_data(asset, config, token, name)
+        for name in names})
+
+
+async def get_system(asset: Asset, config: dict, token: str,
+                     name: str) -> dict:
+    """Returns the data of a system endpoint (disks, memory or version).
+
+    The system endpoints which are in use by the checks of the asset are
+    requested concurrently once and the snapshot is re-used by the other
+    system checks which run shortly after; Like cached data, the returned
+    data must not be modified.
+    """
+    now = time.time()
+    interval = config.get('_interval', DEF_INTERVAL)
+    requested = _system_requested[asset.id]
+    requested[name] = now
+
+    max_age = min(interval, SYSTEM_SNAPSHOT_AGE)
+    snapshot = _system.get(asset.id)
+    if snapshot is None or snapshot[0] + max_age < now or (
+            snapshot[2].done() and (
+                snapshot[2].cancelled() or snapshot[2].exception())):
+        min_ts = now - interval * SYSTEM_REQUESTED_INTERVALS
+        names = tuple(
+            n for n in SYSTEM_ENDPOINTS if requested.get(n, 0.0) >= min_ts)
+        snapshot = _system[asset.id] = now, names, asyncio.ensure_future(
+            _get_system_snapshot(asset, config, token, names))
+    elif name not in snapshot[1]:
+        # the first request since the check was enabled; The endpoint is
+        # part of the next snapshot
+        return await _get_system_data(asset, config, token, name)
+
+    data, errors = await asyncio.shield(snapshot[2])
+    if name in errors:
+        raise Exception(errors[name])
+    return data[name]
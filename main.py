@@ -1,33 +1,29 @@
-from libprobe.probe import Probe
-from lib.check.alerts import CheckAlerts
-from lib.check.cpu import CheckCpu
-from lib.check.disks import CheckDisks
-from lib.check.hardware import CheckHardware
-from lib.check.io import CheckIo
-from lib.check.memory import CheckMemory
-from lib.check.network import CheckNetwork
-from lib.check.problems import CheckProblems
-from lib.check.storage import CheckStorage
-from lib.check.system import CheckSystem
+import os
+from lib.fingerprint import FingerprintProbe
+from lib.registry import close_sessions, get_checks
 
 from lib.version import __version__ as version
 
+# Check modules are imported on first use, see lib/registry.py
+checks = get_checks()
+
 
 if __name__ == '__main__':
-    checks = (
-        CheckAlerts,
-        CheckDisks,
-        CheckHardware,
-        CheckMemory,
-        CheckNetwork,
-        CheckProblems,
-        CheckStorage,
-        CheckSystem,
+    workers = int(os.getenv('WORKERS', '0'))
+    if workers:
+        from lib.shard import WorkerPool
+        pool = WorkerPool(workers, checks)
+        pool.start()
+        checks = pool.wrap(checks)
+        on_close = pool.close
+    else:
+        on_close = close_sessions
+
+    probe = FingerprintProbe("oraclezfs", version, checks)
 
-        # Analytics checks
-        CheckCpu,
-        CheckIo,
-    )
+    # The on-close callback is awaited at the end of a dry-run; In daemon mode
+    # libprobe cancels all tasks and the connections are released on exit.
+    if os.getenv('DRY_RUN'):
+        probe.set_on_close(on_close)
 
-    probe = Probe("oraclezfs", version, checks)
     probe.start()
@@ -0,0 +1,17 @@
+"""Local HTTP server for tests which make requests."""
+from typing import Awaitable, Callable
+from aiohttp import web
+
+
+async def serve(handler: Callable[[web.Request], Awaitable[web.Response]]
+                ) -> tuple[web.AppRunner, int]:
+    """Serves all paths with the handler on a free port; Call cleanup() on
+    the returned runner when done."""
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, port
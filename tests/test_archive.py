@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from pathlib import Path
+import aiohttp
+import pytest
+from aiohttp import web
+from lib import archive
+from .appliance import serve
+
+
+def test_record_and_replay(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(archive, 'RECORD', str(tmp_path))
+    threads = []
+    pack = archive._pack
+
+    def record_thread(entry: archive.Entry) -> bytes:
+        threads.append(threading.current_thread().name)
+        return pack(entry)
+
+    monkeypatch.setattr(archive, '_pack', record_thread)
+
+    async def handler(request: web.Request) -> web.Response:
+        if request.headers.get('If-None-Match'):
+            return web.Response(status=304)
+        return web.json_response({'path': request.path_qs}, headers={
+            'ETag': '"v1"', 'X-Auth-Session': 'secret'})
+
+    async def record():
+        runner, port = await serve(handler)
+        session = archive.RecordingSession(aiohttp.ClientSession())
+        ctx = {'asset_id': 7, 'endpoint': 'x'}
+        try:
+            for path, headers in (
+                    ('/api/a?start=1', {}),
+                    ('/api/a?start=2', {'If-None-Match': '"v1"'}),
+                    ('/api/b', {})):
+                url = f'http://127.0.0.1:{port}{path}'
+                async with session.get(
+                        url, headers=headers, trace_request_ctx=ctx) as resp:
+                    await resp.read()
+
+            # not recorded without an asset
+            async with session.get(f'http://127.0.0.1:{port}/api/c') as resp:
+                await resp.read()
+        finally:
+            await session.close()
+            await runner.cleanup()
+
+    asyncio.run(record())
+    # compressed and written by the writer thread; Flushed on close
+    assert threads == ['archive'] * 3
+
+    fn = tmp_path / '7.rec'
+    entries = archive.read_archive(str(fn))
+    assert [(e.path, e.status) for e in entries] == [
+        ('/api/a?start=1', 200), ('/api/a?start=2', 304), ('/api/b', 200)]
+    assert entries[0].headers['X-Auth-Session'] == archive.REPLAY_TOKEN
+
+    async def replay():
+        session = archive.ReplaySession(str(fn), 0.0)
+        url = 'http://replay/api/a?start=3'
+
+        # the recorded 304 requires a cached response; Without conditional
+        # headers the complete response is served
+        for _ in range(2):
+            async with session.get(url) as resp:
+                assert resp.status == 200
+                assert await resp.read() == b'{"path": "/api/a?start=1"}'
+
+        async with session.get('http://replay/api/b') as resp:
+            chunks = [chunk async for chunk in resp.content.iter_chunked(4)]
+            assert b''.join(chunks) == b'{"path": "/api/b"}'
+
+        async with session.get('http://replay/api/c') as resp:
+            assert resp.status == 404
+
+    asyncio.run(replay())
@@ -0,0 +1,74 @@
+import asyncio
+from aiohttp import web
+from libprobe.asset import Asset
+from lib.cache import CacheEntry, ResponseCache, response_cache
+from lib.connector import close_sessions
+from lib.utils import get_data
+from .appliance import serve
+
+
+def entry(size: int) -> CacheEntry:
+    return CacheEntry(0.0, None, None, size, None)
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_size=30)
+    cache.set(('a', ), entry(10))
+    cache.set(('b', ), entry(10))
+    cache.set(('c', ), entry(10))
+    assert cache.get(('a', )) is not None  # `b` is now the oldest
+
+    cache.set(('d', ), entry(10))
+    assert cache.get(('b', )) is None
+    assert cache.stats()['size'] == 30
+
+    cache.set(('a', ), entry(5))
+    assert cache.stats()['size'] == 25
+
+    # larger than the cache
+    cache.set(('e', ), entry(31))
+    assert cache.get(('e', )) is None
+    assert cache.stats()['entries'] == 3
+
+
+def test_revalidate():
+    requests = []
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(request.headers.get('If-None-Match'))
+        if request.path.endswith('/plain'):
+            return web.json_response({'n': len(requests)})
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304)
+        return web.json_response({'n': len(requests)}, headers={
+            'ETag': '"v1"'})
+
+    async def main():
+        runner, port = await serve(handler)
+        config = {'address': '127.0.0.1', 'port': port, 'secure': False}
+        asset = Asset(9001, 'cache', 'test')
+        try:
+            hits = response_cache.hits
+            not_modified = response_cache.not_modified
+
+            # with ttl 0 the response is re-validated on each request
+            for _ in range(2):
+                data = await get_data(asset, config, 't', 'x', 'etag', 0)
+                assert data == {'n': 1}
+            assert requests == [None, '"v1"']
+            assert response_cache.not_modified == not_modified + 1
+
+            # served from the cache within the ttl
+            await get_data(asset, config, 't', 'x', 'etag', 60)
+            await get_data(asset, config, 't', 'x', 'etag', 60)
+            assert response_cache.hits == hits + 1
+
+            # without validators nothing is cached with ttl 0
+            for n in (4, 5):
+                data = await get_data(asset, config, 't', 'x', 'plain', 0)
+                assert data == {'n': n}
+        finally:
+            await close_sessions()
+            await runner.cleanup()
+
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+import asyncio
+from bench.data import chassis, cluster
+from lib.check import hardware
+from lib.cluster import NOT_CLUSTERED, _topology
+
+
+def test_clustered():
+    data = cluster('a', 'b', 4)['cluster']
+    a, b = _topology(data, 'a'), _topology(data, 'b')
+    assert a.pools == {'pool-0', 'pool-2'}
+    assert b.pools == {'pool-1', 'pool-3'}
+    assert a.primary and not b.primary
+    assert not a.owns('pool-1') and b.owns('pool-1')
+
+
+def test_fallback():
+    # takeover, unreachable peer or unknown ownership; both heads report all
+    for key, value in (
+            ('state', 'AKCS_OWNER'),
+            ('state', 'AKCS_STRIPPED'),
+            ('peer_state', 'AKCS_OWNER'),
+            ('peer_state', 'AKCS_STRIPPED'),
+            ('peer_state', None),
+            ('resources', [])):
+        for nodename, peer in (('a', 'b'), ('b', 'a')):
+            data = cluster(nodename, peer, 4)['cluster']
+            data[key] = value
+            topology = _topology(data, nodename)
+            assert topology.primary, (key, value)
+            assert topology.pools is None, (key, value)
+            assert topology.owns('pool-1')
+
+
+def test_unknown_owner():
+    data = cluster('a', 'b', 4)['cluster']
+    del data['resources'][0]['owner']
+    topology = _topology(data, 'b')
+    assert topology.primary and topology.pools is None
+
+
+def test_hardware_fallback(monkeypatch):
+    async def get_data(*args):
+        return chassis(3)
+
+    monkeypatch.setattr(hardware, 'get_data', get_data)
+    secondary = _topology(cluster('a', 'b', 4)['cluster'], 'b')
+    for topology, n in ((secondary, 1), (NOT_CLUSTERED, 3)):
+        state = asyncio.run(hardware.get_hardware(
+            None, {}, '', topology))  # type: ignore
+        assert len(state['chassis']) == n
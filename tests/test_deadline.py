@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+from lib import deadline
+
+
+def test_no_deadline():
+    async def main():
+        assert deadline.remaining() is None
+        assert deadline.request_timeout() is None
+        assert deadline.retry_delay() is None
+
+    asyncio.run(main())
+
+
+def test_request_timeout():
+    async def main():
+        deadline.set_deadline({'_interval': 100})
+        timeout = 0.8 * 100 * deadline.DEADLINE_FACTOR
+        first = deadline.request_timeout()
+        retry = deadline.request_timeout(True)
+        assert first is not None and retry is not None
+        assert retry == pytest.approx(timeout, abs=0.1)
+        assert first == pytest.approx(
+            timeout * (1 - deadline.RETRY_SHARE), abs=0.1)
+        assert deadline.retry_delay() is not None
+
+    asyncio.run(main())
+
+
+def test_deadline_exceeded():
+    async def main():
+        deadline._deadline.set(asyncio.get_running_loop().time() - 1.0)
+        with pytest.raises(asyncio.TimeoutError):
+            deadline.request_timeout()
+        assert deadline.retry_delay() is None
+
+    asyncio.run(main())
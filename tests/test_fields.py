@@ -0,0 +1,62 @@
+import time
+from lib.fields import Field, Schema, to_timestamp, to_utc_timestamp
+from lib.fields import try_timestamp
+
+SCHEMA = Schema(
+    Field('name', 'name'),
+    Field('size', 'usage.total', int),
+    Field('ratio', 'usage.compressratio', float, True),
+    Field('status', ('state', 'status')),
+    Field('label', 'label', str, True),
+)
+
+
+def convert(item: dict) -> dict:
+    usage = item.get('usage', {})
+    ratio = usage.get('compressratio')
+    label = item.get('label')
+    return {
+        'name': item['name'],
+        'size': int(usage['total']),
+        'ratio': None if ratio is None else float(ratio),
+        'status': item['state'] if 'state' in item else item['status'],
+        'label': None if label is None else str(label),
+    }
+
+
+ITEMS = [
+    {'name': 'a', 'usage': {'total': '10', 'compressratio': 150},
+     'state': 'online', 'label': 1},
+    {'name': 'b', 'usage': {'total': 20}, 'status': 'offline'},
+    {'name': 'c', 'usage': {'total': 0, 'compressratio': None},
+     'state': None, 'status': 'x', 'label': None},
+]
+
+
+def test_convert():
+    assert SCHEMA.convert(ITEMS) == [convert(item) for item in ITEMS]
+
+
+def test_convert_one():
+    for item in ITEMS:
+        assert SCHEMA.convert_one(item) == convert(item)
+
+
+def test_missing_key():
+    try:
+        SCHEMA.convert([{'name': 'a', 'status': 'x'}])
+    except KeyError as e:
+        assert e.args == ('total', )
+    else:
+        assert False, 'expecting a KeyError'
+
+
+def test_timestamp():
+    assert to_timestamp('2024-01-02T03:04:05Z') == 1704164645
+    assert to_timestamp('2024-01-02T05:04:05+02:00') == 1704164645
+    assert to_timestamp('2024-01-02T03:04:05.123Z') == 1704164645
+    assert to_utc_timestamp('20240102T03:04:05') == 1704164645
+    assert to_utc_timestamp('2024-01-02T04:04:05+01:00') == 1704164645
+    assert to_timestamp('20240102T03:04:05') == int(time.mktime(
+        (2024, 1, 2, 3, 4, 5, 0, 0, -1)))
+    assert try_timestamp('not a time') is None
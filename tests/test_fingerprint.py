@@ -0,0 +1,57 @@
+import inspect
+from typing import Any, cast
+from libprobe import probe as libprobe_probe
+from libprobe.check import Check
+from libprobe.probe import Probe
+from lib.fingerprint import FingerprintProbe, fingerprint, pop_suppressed
+
+
+class CheckTest(Check):
+    key = 'test'
+    unchanged_eol = 3600
+
+
+def result(*names: str) -> dict:
+    return {'items': [{'name': name, 'value': 1} for name in names]}
+
+
+def test_fingerprint():
+    digest, size = fingerprint(result('a', 'b'))
+    assert fingerprint(result('a', 'b')) == (digest, size)
+    assert fingerprint(result('b', 'a'))[0] != digest
+    assert fingerprint({'other': result('a', 'b')['items']})[0] != digest
+    assert size > 0
+
+
+def test_unchanged():
+    # only the fingerprints are used, so no probe is started
+    probe = cast(Any, object.__new__(FingerprintProbe))
+    probe._fingerprints = {}
+    path = (9001, 1)
+
+    def unchanged(res: dict | None, error: dict | None = None) -> bool:
+        return FingerprintProbe._unchanged(probe, CheckTest, path, res, error)
+
+    assert not unchanged(result('a', 'b'))
+    assert unchanged(result('b', 'a'))  # ordered by name
+    assert not unchanged(result('a'))
+    assert not unchanged(None, {'message': 'error'})
+    assert not unchanged(result('a'))
+    assert unchanged(result('a'))
+
+    count, size = pop_suppressed(9001)
+    assert count == 2
+    assert size == \
+        fingerprint(result('a', 'b'))[1] + fingerprint(result('a'))[1]
+
+
+def test_libprobe_hook():
+    # FingerprintProbe overrides a private method of libprobe; This fails
+    # when an upgrade of libprobe changes or no longer uses the method
+    assert str(inspect.signature(Probe._unchanged)) == (
+        '(self, check: type[libprobe.check.Check], path: tuple, '
+        'result: dict | None, error: dict | None) -> bool')
+    assert inspect.signature(FingerprintProbe._unchanged) == \
+        inspect.signature(Probe._unchanged)
+    assert 'self._unchanged(check, path, result, error)' in \
+        inspect.getsource(libprobe_probe)
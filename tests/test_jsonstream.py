@@ -0,0 +1,63 @@
+import json
+import random
+import pytest
+from lib import codec
+from lib.jsonstream import ItemStream
+from bench.data import alerts, luns
+
+CODECS = [codec._stdlib_loads] + [
+    func for func in (codec._get_orjson_loads(), ) if func is not None]
+
+DOCS = [
+    luns(20),
+    {'other': [{'luns': [1]}], 'luns': [
+        1, -2.5e3, 's\\"]},', None, True, [], {}, [[1], {'b': 'é€'}],
+        {'a': {'b': '},'}, 'c': [{'d': 1}, 2]}], 'z': {'q': '}'}},
+    {'luns': []},
+    {'other': 1},
+    {'luns': None},
+    None,
+]
+
+
+def stream(body: bytes, key: str, sizes: list[int], loads) -> list:
+    items = ItemStream(key, loads)
+    out = []
+    pos = 0
+    for size in sizes:
+        out.extend(items.feed(body[pos:pos + size]))
+        pos += size
+    out.extend(items.feed(body[pos:]))
+    out.extend(items.close())
+    return out
+
+
+@pytest.mark.parametrize('loads', CODECS)
+@pytest.mark.parametrize('doc', DOCS)
+def test_split_chunks(loads, doc):
+    body = json.dumps(doc, indent=1).encode()
+    expected = doc.get('luns') or [] if isinstance(doc, dict) else []
+    rnd = random.Random(0)
+    for _ in range(50):
+        sizes = [rnd.randint(1, 40) for _ in range(len(body) // 20)]
+        assert stream(body, 'luns', sizes, loads) == expected
+
+
+@pytest.mark.parametrize('loads', CODECS)
+def test_alerts(loads):
+    doc = alerts(100)
+    body = json.dumps(doc).encode()
+    assert stream(body, 'logs', [4096] * 10, loads) == doc['logs']
+
+
+@pytest.mark.parametrize('body', [
+    b'{"luns": [1, 2',
+    b'{"luns": [{"a": 1}',
+    b'{"luns": ["x]',
+    b'{"luns" [1]}',
+])
+def test_incomplete(body):
+    items = ItemStream('luns')
+    with pytest.raises(ValueError):
+        items.feed(body)
+        items.close()
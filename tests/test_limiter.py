@@ -0,0 +1,78 @@
+import asyncio
+import time
+import pytest
+from lib.limiter import DECREASE_FACTOR, INITIAL_LIMIT, Limiter
+
+
+def test_increase():
+    limiter = Limiter(1, 8)
+    limiter.active = 1
+    limiter.release(time.perf_counter(), 0.01)
+    assert limiter.limit == pytest.approx(INITIAL_LIMIT + 1 / INITIAL_LIMIT)
+    assert limiter.decreases == 0
+
+
+def test_decrease_on_error():
+    limiter = Limiter(1, 8)
+    limiter.active = 1
+    limiter.release(time.perf_counter(), None, False)
+    assert limiter.limit == pytest.approx(INITIAL_LIMIT * DECREASE_FACTOR)
+    assert limiter.decreases == 1
+
+
+def test_single_decrease_for_concurrent_requests():
+    limiter = Limiter(1, 8)
+    limiter.active = 2
+    first, second = time.perf_counter(), time.perf_counter()
+    limiter.release(first, None, False)
+    limiter.release(second, None, False)
+    assert limiter.decreases == 1
+
+    # a request started after the decrease decreases again
+    limiter.active = 1
+    limiter.release(time.perf_counter(), None, False)
+    assert limiter.decreases == 2
+
+
+def test_decrease_on_slow_response():
+    limiter = Limiter(1, 8)
+    limiter.active = 2
+    limiter.release(time.perf_counter(), 0.1)
+    limiter.release(time.perf_counter(), 1.0)
+    assert limiter.decreases == 1
+
+
+def test_bounds():
+    limiter = Limiter(2, 3)
+    assert limiter.limit == 3
+    for _ in range(10):
+        limiter.active = 1
+        limiter.release(time.perf_counter(), None, False)
+        time.sleep(0.001)
+    assert limiter.limit == 2
+    limiter.set_bounds(0, 0)
+    assert limiter.floor == limiter.ceiling == 1
+
+
+def test_queue():
+    async def main():
+        limiter = Limiter(1, 1)
+        started = []
+
+        async def request(i: int):
+            async with limiter.slot() as slot:
+                started.append(i)
+                await asyncio.sleep(0.01)
+                slot.response(200)
+
+        tasks = [asyncio.ensure_future(request(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        assert limiter.active == 1 and limiter.queued == 2
+
+        # a cancelled waiter does not hold a slot
+        tasks[1].cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert started == [0, 2]
+        assert limiter.active == 0 and limiter.queued == 0
+
+    asyncio.run(main())
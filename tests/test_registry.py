@@ -0,0 +1,26 @@
+import asyncio
+import threading
+from lib import registry
+
+
+def test_load_async(monkeypatch):
+    threads = []
+    load = registry.load
+
+    def record(path):
+        threads.append(threading.current_thread())
+        return load(path)
+
+    monkeypatch.setattr(registry, '_loaded', {})
+    monkeypatch.setattr(registry, 'load', record)
+    path = 'lib.check.memory:CheckMemory'
+
+    async def main():
+        return await registry.load_async(path), await registry.load_async(path)
+
+    first, second = asyncio.run(main())
+    assert first is second
+    assert first.key == 'memory'
+    # imported once and not in the thread running the event loop
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
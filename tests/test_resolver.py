@@ -0,0 +1,47 @@
+import asyncio
+import socket
+import pytest
+from lib.resolver import CachingResolver
+
+
+class FakeResolver:
+    def __init__(self):
+        self.lookups = 0
+
+    async def resolve(self, host: str, port: int = 0,
+                      family: socket.AddressFamily = socket.AF_INET):
+        self.lookups += 1
+        await asyncio.sleep(0.01)
+        if host == 'unknown':
+            raise OSError('unknown host')
+        return [{
+            'hostname': host, 'host': '192.0.2.1', 'port': port,
+            'family': family, 'proto': 0, 'flags': 0}]
+
+
+def test_cache(monkeypatch: pytest.MonkeyPatch):
+    async def main():
+        resolver = CachingResolver(asyncio.get_running_loop())
+        fake = FakeResolver()
+        monkeypatch.setattr(resolver, '_resolver', fake)
+
+        # concurrent lookups wait for a single lookup
+        results = await asyncio.gather(
+            resolver.resolve('zfs', 215), resolver.resolve('zfs', 443))
+        assert [res[0]['port'] for res in results] == [215, 443]
+        assert fake.lookups == 1
+
+        await resolver.resolve('zfs', 215)
+        assert fake.lookups == 1 and resolver.hits == 1
+
+        resolver.invalidate('zfs')
+        await resolver.resolve('zfs', 215)
+        assert fake.lookups == 2 and resolver.refreshes == 1
+
+        # a failed lookup is cached as well
+        for _ in range(2):
+            with pytest.raises(OSError):
+                await resolver.resolve('unknown')
+        assert fake.lookups == 3 and resolver.failures == 1
+
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import asyncio
+from collections import Counter
+import pytest
+from libprobe.asset import Asset
+from libprobe.check import Check
+from libprobe.exceptions import CheckException, IncompleteResultException
+from libprobe.exceptions import NoCountException
+from libprobe.severity import Severity
+from lib import shard
+from lib.shard import HashRing, WorkerPool, _exc_from_tuple, _exc_to_tuple
+
+
+class CheckEcho(Check):
+    key = 'echo'
+    unchanged_eol = 0
+
+    @staticmethod
+    async def run(asset: Asset, local_config: dict, config: dict) -> dict:
+        if config.get('fail'):
+            raise IncompleteResultException(
+                'partial', {'echo': []}, Severity.HIGH)
+        return {'echo': [{'name': asset.name, 'pid': config['pid']}]}
+
+
+def test_hash_ring():
+    ring = HashRing(4)
+    workers = Counter(ring.get(asset_id) for asset_id in range(4000))
+    assert set(workers) == {0, 1, 2, 3}
+    assert min(workers.values()) > 600
+
+    # adding a worker moves only part of the assets
+    grown = HashRing(5)
+    moved = sum(
+        ring.get(asset_id) != grown.get(asset_id)
+        for asset_id in range(4000))
+    assert moved < 1200
+
+
+@pytest.mark.parametrize('e', [
+    IncompleteResultException('partial', {'a': []}, Severity.HIGH),
+    NoCountException('no count', {'a': []}),
+    CheckException('failed'),
+])
+def test_exceptions(e: Exception):
+    copy = _exc_from_tuple(*_exc_to_tuple(e))
+    assert type(copy) is type(e) and str(copy) == str(e)
+    assert getattr(copy, 'result', None) == getattr(e, 'result', None)
+    assert getattr(copy, 'severity', None) == getattr(e, 'severity', None)
+
+
+def test_worker_pool():
+    async def main():
+        pool = WorkerPool(2, (CheckEcho, ))
+        pool.start()
+        try:
+            config = {'pid': 0}
+            result = await pool.run('echo', Asset(1, 'a', 'echo'), {}, config)
+            assert result == {'echo': [{'name': 'a', 'pid': 0}]}
+
+            with pytest.raises(IncompleteResultException) as info:
+                await pool.run('echo', Asset(1, 'a', 'echo'), {}, {
+                    'fail': True})
+            assert info.value.result == {'echo': []}
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
+
+
+def test_restart(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(shard, 'RESTART_DELAY', 0.2)
+
+    async def main():
+        pool = WorkerPool(1, (CheckEcho, ))
+        pool.start()
+        asset = Asset(1, 'a', 'echo')
+        try:
+            await pool.run('echo', asset, {}, {'pid': 0})
+            process = pool._workers[0].process
+            assert process is not None
+            process.kill()
+            await asyncio.sleep(0.1)
+
+            # the stopped process is joined and not restarted at once
+            assert process.exitcode is not None
+            with pytest.raises(Exception, match='restart in'):
+                await pool.run('echo', asset, {}, {'pid': 0})
+
+            await asyncio.sleep(0.2)
+            result = await pool.run('echo', asset, {}, {'pid': 1})
+            assert result == {'echo': [{'name': 'a', 'pid': 1}]}
+            assert pool._workers[0].stops == 0
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+import asyncio
+from aiohttp import web
+from libprobe.asset import Asset
+from lib.connector import close_sessions
+from lib.utils import get_analytics_many, get_data
+from .appliance import serve
+
+
+def test_single_flight():
+    tokens = []
+
+    async def handler(request: web.Request) -> web.Response:
+        tokens.append(request.headers['X-Auth-Session'])
+        await asyncio.sleep(0.05)
+        return web.json_response({'n': len(tokens)})
+
+    async def main():
+        runner, port = await serve(handler)
+        config = {'address': '127.0.0.1', 'port': port, 'secure': False}
+        a, b = Asset(9101, 'a', 'test'), Asset(9102, 'b', 'test')
+        try:
+            # the same asset shares a request, another asset (with the same
+            # address) or another ttl does not
+            results = await asyncio.gather(
+                get_data(a, config, 'token-a', 'x', 'y'),
+                get_data(a, config, 'token-a', 'x', 'y'),
+                get_data(b, config, 'token-b', 'x', 'y'),
+                get_data(a, config, 'token-a', 'x', 'y', 60))
+        finally:
+            await close_sessions()
+            await runner.cleanup()
+
+        assert results[0] is results[1]
+        assert sorted(tokens) == ['token-a', 'token-a', 'token-b']
+
+    asyncio.run(main())
+
+
+def test_dataset_path():
+    paths = []
+
+    async def handler(request: web.Request) -> web.Response:
+        paths.append(request.raw_path)
+        return web.json_response({'data': {'data': {'value': 1}}})
+
+    async def main():
+        runner, port = await serve(handler)
+        config = {'address': '127.0.0.1', 'port': port, 'secure': False}
+        asset = Asset(9103, 'a', 'test')
+        try:
+            await get_analytics_many(asset, config, 't', (
+                'nic.kilobytes[device]', 'a/b'))
+        finally:
+            await close_sessions()
+            await runner.cleanup()
+
+        assert sorted(paths) == [
+            '/api/analytics/v2/datasets/a%2Fb/data?span=minute',
+            '/api/analytics/v2/datasets/nic.kilobytes%5Bdevice%5D/data'
+            '?span=minute',
+        ]
+
+    asyncio.run(main())